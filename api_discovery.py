@@ -0,0 +1,235 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlencode, urljoin, urlsplit, urlunsplit
+
+from browser_extract import PageExtract
+from browser_pool import browser_pool
+from fetch import fetch_url
+from json_path import FieldMapper, compile_path, resolve
+
+# Query parameters that number pages (step 1) or offset into results (step = page size)
+PAGE_PARAMS = ("page", "p", "pg", "page_number", "pageNumber", "pageIndex")
+OFFSET_PARAMS = ("offset", "start", "skip", "from")
+
+# Payload keys that usually hold the next page's URL or cursor / a has-more flag
+NEXT_KEYS = (
+    "next", "next_url", "nextUrl", "next_page_url", "nextPage",
+    "links.next", "paging.next", "cursor", "next_cursor", "nextCursor",
+)
+HAS_NEXT_KEYS = ("has_next", "hasNext", "has_more", "hasMore", "more")
+CURSOR_PARAMS = ("cursor", "after", "page_token", "pageToken", "next")
+
+
+def _item_lists(data: Any, path: str = "") -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Every list of objects in a payload, with its JSON path.
+    """
+    found = []
+    if isinstance(data, list):
+        if data and all(isinstance(item, dict) for item in data):
+            found.append((path, data))
+        for i, item in enumerate(data[:1]):
+            found.extend(_item_lists(item, f"{path}[{i}]"))
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            step = key if key.isidentifier() else f"['{key}']"
+            found.extend(_item_lists(value, f"{path}.{step}" if path else step))
+    return found
+
+
+def _leaf_fields(item: Dict[str, Any], prefix: str = "", depth: int = 2) -> Dict[str, str]:
+    """
+    Suggested field mapping: scalar (and scalar-list) leaves of one item, two levels deep.
+    """
+    fields = {}
+    for key, value in item.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            if depth > 1:
+                fields.update(_leaf_fields(value, path, depth - 1))
+        elif not isinstance(value, list) or all(not isinstance(v, (dict, list)) for v in value):
+            fields[path.replace(".", "_")] = path
+    return fields
+
+
+def _paging(url: str, payload: Any, items: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    How this endpoint pages: a numbered/offset query parameter, or a next link/cursor.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+
+    for names, kind in ((PAGE_PARAMS, "page"), (OFFSET_PARAMS, "offset")):
+        for i, (name, value) in enumerate(query):
+            if name in names and value.isdigit():
+                templated = query[:i] + [(name, "{page}")] + query[i + 1:]
+                template = urlunsplit(parts._replace(query=urlencode(templated, safe="{}")))
+                paging = {
+                    "url": template,
+                    "start_page": int(value),
+                    "page_step": 1 if kind == "page" else len(items),
+                }
+                has_next = next((k for k in HAS_NEXT_KEYS if resolve(payload, compile_path(k)) is not None), None)
+                if has_next:
+                    paging["has_next"] = has_next
+                return paging
+
+    for key in NEXT_KEYS:
+        value = resolve(payload, compile_path(key))
+        if not isinstance(value, str) or not value:
+            continue
+        if "/" in value or value.startswith("?"):
+            return {"url": url, "next": key}
+
+        # A bare cursor: it goes back in a query parameter
+        names = [name for name, _ in query]
+        param = next((name for name in CURSOR_PARAMS if name in names), "cursor")
+        templated = [(name, v) for name, v in query if name != param] + [(param, "{cursor}")]
+        template = urlunsplit(parts._replace(query=urlencode(templated, safe="{}")))
+        return {"url": template, "start_url": url, "next": key}
+
+    return None
+
+
+def discover_api(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Render url once, record its JSON XHR/fetch responses, and describe the
+    paginated data endpoint as a config "api" section (None if there is none).
+    The biggest list of objects wins; "fields" is a starting point to edit.
+    """
+    def record(page) -> List[Tuple[str, Any]]:
+        responses = []
+
+        def on_response(response) -> None:
+            if response.request.resource_type in ("xhr", "fetch"):
+                responses.append(response)
+
+        page.on("response", on_response)
+        try:
+            page.goto(url, timeout=25000, wait_until="networkidle")
+        finally:
+            page.remove_listener("response", on_response)
+
+        payloads = []
+        for response in responses:
+            try:
+                payloads.append((response.url, response.json()))
+            except Exception:
+                continue
+        return payloads
+
+    try:
+        payloads = browser_pool.run(record)
+    except Exception as e:
+        print(f"[api] Discovery render failed for {url}: {e}")
+        return None
+
+    print(f"[api] {len(payloads)} JSON responses recorded on {url}")
+
+    best = None
+    for response_url, payload in payloads:
+        for path, items in _item_lists(payload):
+            paging = _paging(response_url, payload, items)
+            # Paginated endpoints first, then the biggest list
+            score = (paging is not None, len(items))
+            if best is None or score > best[0]:
+                best = (score, response_url, path, items, paging)
+
+    if best is None:
+        print("[api] No JSON response carried a list of records")
+        return None
+
+    _, response_url, path, items, paging = best
+    if paging is None:
+        print(f"[api] {response_url} has records but no recognizable pagination")
+        return None
+
+    section = dict(paging)
+    if path:
+        section["items"] = path
+    section["fields"] = _leaf_fields(items[0])
+    return section
+
+
+class ApiSource:
+    def __init__(self):
+        self.settings: Optional[Dict[str, Any]] = None
+        self.mapper: Optional[FieldMapper] = None
+        self.pages_fetched = 0
+        self._page_of: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings is not None
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        """
+        A config "api" section (see discover_api) makes listings plain HTTP
+        GETs of the JSON endpoint instead of pages to scrape or render.
+        """
+        self.settings = config.get("api")
+        if not self.settings:
+            self.settings = None
+            return
+
+        self.mapper = FieldMapper(self.settings["fields"], self.settings.get("items"))
+        self._page_of = {}
+
+    def _page_url(self, page: int) -> str:
+        url = self.settings["url"].replace("{page}", str(page))
+        self._page_of[url] = page
+        return url
+
+    @property
+    def start_url(self) -> str:
+        if "{page}" in self.settings["url"]:
+            return self._page_url(self.settings.get("start_page", 1))
+        return self.settings.get("start_url", self.settings["url"])
+
+    def _next_url(self, url: str, payload: Any, items: List[Dict[str, Any]]) -> Optional[str]:
+        if not items:
+            return None
+
+        if "next" in self.settings:
+            value = resolve(payload, compile_path(self.settings["next"]))
+            if value in (None, "", False):
+                return None
+            value = str(value)
+            if "{cursor}" in self.settings["url"]:
+                return self.settings["url"].replace("{cursor}", quote(value, safe=""))
+            return urljoin(url, value)
+
+        if "has_next" in self.settings and not resolve(payload, compile_path(self.settings["has_next"])):
+            return None
+
+        if url in self._page_of:
+            return self._page_url(self._page_of[url] + self.settings.get("page_step", 1))
+        return None
+
+    def fetch(self, url: str, paced: bool = False) -> Optional[PageExtract]:
+        """
+        One listing page from the endpoint. RetryLater propagates as for any
+        fetch; paced is passed on to fetch_url.
+        """
+        body = fetch_url(url, "list", paced)
+        if body is None:
+            return None
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            print(f"[api] {url} did not return JSON")
+            return None
+
+        self.pages_fetched += 1
+        items = self.mapper.records(payload)
+        # Detail links in a payload are relative to the endpoint, not the HTML base
+        for item in items:
+            if isinstance(item.get("url"), str) and item["url"]:
+                item["url"] = urljoin(url, item["url"])
+
+        return PageExtract(url, items, self._next_url(url, payload, items))
+
+
+# Listing source for configs with an "api" section
+api_source = ApiSource()
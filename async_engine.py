@@ -0,0 +1,234 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+from api_discovery import api_source
+from async_render import AsyncRenderer
+from browser_extract import PageExtract, parse_list_page
+from browser_pool import browser_pool
+from cache import response_cache
+from concurrency_controller import concurrency_controller
+from details import detail_job, merge_detail, parse_detail
+from document import Document
+from fetch import fetch_url, served_from_cache
+from item_filter import item_filter
+from rate_limiter import rate_limiter
+from render_memory import render_memory
+from retry_queue import RetryLater, RetryQueue
+from smart_fetch import needs_render, render, render_options
+
+
+class HostScheduler:
+    def __init__(self, concurrency: int = 8, renderer: Optional[AsyncRenderer] = None):
+        """
+        concurrency: max requests in flight across all hosts
+        renderer: async Playwright backend for JS pages; None renders via the
+                  threaded browser pool instead
+
+        The per-host limit comes from the shared AIMD concurrency controller and
+        request pacing from the shared per-host rate limiter, awaited on the loop.
+        """
+        self.renderer = renderer
+        self._global = asyncio.Semaphore(concurrency)
+        self._changed = asyncio.Condition()
+        self._in_flight: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str, pace: bool = False):
+        """
+        pace: also wait for the host's token bucket, once the host slot is
+              granted and before taking a global permit
+        """
+        host = urlsplit(url).netloc.lower()
+
+        # Host slot first: a task queued behind a saturated host must not sit
+        # on a global permit another host could use
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: self._in_flight.get(host, 0) < concurrency_controller.limit(url)
+            )
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        try:
+            # A host waiting on its rate holds its own slot, not a permit
+            # (or thread) another host could use
+            if pace:
+                await rate_limiter.acquire_async(url)
+            async with self._global:
+                yield
+        finally:
+            async with self._changed:
+                self._in_flight[host] -= 1
+                self._changed.notify_all()
+
+    async def run(self, url: str, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking fetch function in the thread pool once the scheduler admits it.
+        """
+        async with self.slot(url):
+            return await asyncio.to_thread(func, *args)
+
+    async def run_paced(self, url: str, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        run for a function making one fetch_url request for url, which takes
+        fetch_url's paced flag as its last argument. The token is awaited on
+        the loop (see slot) instead of in the thread.
+        """
+        # Cache answers need no token, as in fetch_url
+        cached = response_cache.enabled and await asyncio.to_thread(served_from_cache, url)
+        async with self.slot(url, pace=not cached):
+            return await asyncio.to_thread(func, *args, not cached)
+
+    async def fetch(self, url: str, kind: Optional[str] = None) -> Union[Document, PageExtract, None]:
+        """
+        smart_fetch for the async engine: static fetches paced on the loop and
+        run in a thread, renders on the async renderer's shared pages when one
+        is configured (on the threaded browser pool otherwise).
+        """
+        if kind == "list" and api_source.enabled:
+            return await self.run_paced(url, api_source.fetch, url)
+
+        if not render_memory.skip_static(url, kind):
+            html = await self.run_paced(url, fetch_url, url, kind)
+            reason = await asyncio.to_thread(needs_render, url, kind, html)
+            if not reason:
+                return Document(html, url) if html is not None else None
+
+            print(f"[smart_fetch] {reason}; rendering with {'async ' if self.renderer else ''}Playwright...")
+
+        if self.renderer is None:
+            return await self.run(url, render, url, kind)
+        async with self.slot(url):
+            result = await self.renderer.render(url, **render_options(kind))
+        return Document(result, url) if isinstance(result, str) else result
+
+    async def run_with_retries(self, job: Dict[str, Any], retries: RetryQueue,
+                               fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fetch(), but a transient failure waits out its retry delay in this
+        task only, so other URLs and hosts keep flowing. A None result
+        (permanent failure or exhausted retries) is dead-lettered.
+        """
+        while True:
+            try:
+                result = await fetch()
+            except RetryLater as e:
+                delay = retries.next_delay(job, e)
+                if delay is None:
+                    return None
+                await asyncio.sleep(delay)
+                continue
+
+            if result is None:
+                retries.dead_letter(job, "fetch failed")
+            return result
+
+
+async def scrape_detail_async(scheduler: HostScheduler, retries: RetryQueue,
+                              item: Dict[str, Any], detail_fields: Dict[str, Any]) -> None:
+    job = detail_job(item)
+    html = await scheduler.run_with_retries(job, retries, partial(scheduler.fetch, job["url"], job["kind"]))
+    if html is not None:
+        merge_detail(item, await asyncio.to_thread(parse_detail, job["url"], html, detail_fields))
+
+
+async def crawl_async(
+    start_url: str,
+    config: Dict[str, Any],
+    base_url: str,
+    max_pages: int,
+    scheduler: HostScheduler,
+    retries: RetryQueue,
+) -> List[Dict[str, Any]]:
+    """
+    Same crawl as the sequential loop in main, but detail pages of a listing
+    are fetched concurrently and the next listing page is fetched while the
+    previous page's details are still in flight.
+    """
+    pages: List[List[Dict[str, Any]]] = []
+    detail_tasks: List[asyncio.Future] = []
+    detail_fields = config.get("detail_fields")
+    page_counter = 0
+    next_url = start_url
+
+    while next_url:
+        print(f"Scraping: {next_url}")
+
+        job = {"url": next_url, "kind": "list"}
+        html = await scheduler.run_with_retries(job, retries, partial(scheduler.fetch, next_url, job["kind"]))
+        if html is None:
+            print("Failed to retrieve page (dead-lettered); stopping.")
+            break
+
+        # --- LIST PAGE PARSING (off the loop: details keep flowing meanwhile) ---
+        items, page_next = await asyncio.to_thread(parse_list_page, next_url, html, config, base_url)
+        print(f"  Found {len(items)} items")
+
+        if not items:
+            print("No items found; site structure may differ.")
+            break
+
+        # --- FILTERS: items the listing already rules out never cost a detail fetch ---
+        if item_filter.enabled:
+            kept = item_filter.apply(items)
+            print(f"  Kept {len(kept)} of {len(items)} items after filters")
+            items = kept
+
+        # --- DETAIL PAGE PARSING (OPTIONAL, CONFIG-DRIVEN) ---
+        if detail_fields:
+            for item in items:
+                if not item.get("url"):
+                    continue
+                detail_tasks.append(asyncio.ensure_future(
+                    scrape_detail_async(scheduler, retries, item, detail_fields)
+                ))
+        else:
+            item_filter.remember(items)
+
+        pages.append(items)
+
+        # --- PAGINATION ---
+        next_url = page_next
+
+        page_counter += 1
+        if page_counter >= max_pages:
+            print("Reached max_pages; stopping.")
+            break
+
+    if detail_tasks:
+        await asyncio.gather(*detail_tasks)
+
+    return [item for items in pages for item in items]
+
+
+def run_async_crawl(
+    start_url: str,
+    config: Dict[str, Any],
+    base_url: str,
+    max_pages: int,
+    retries: RetryQueue,
+    concurrency: int = 8,
+    render_pages: int = 4,
+) -> List[Dict[str, Any]]:
+    async def runner():
+        # Blocking fetches run in threads; size the pool to the global limit
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=concurrency)
+        )
+
+        renderer = None
+        if render_pages > 0:
+            renderer = AsyncRenderer(render_pages, max_navigations=browser_pool.max_navigations)
+
+        scheduler = HostScheduler(concurrency, renderer)
+        try:
+            return await crawl_async(start_url, config, base_url, max_pages, scheduler, retries)
+        finally:
+            if renderer is not None:
+                if renderer.rendered:
+                    print(f"[browser] {renderer.rendered} pages rendered on {render_pages} async pages")
+                await renderer.close()
+
+    return asyncio.run(runner())
@@ -0,0 +1,196 @@
+import asyncio
+import random
+from typing import Any, Dict, Optional, Union
+
+from playwright.async_api import async_playwright
+
+from browser_extract import BrowserExtractor, PageExtract
+from browser_pool import UA_LIST
+from cache import response_cache
+from rate_limiter import rate_limiter
+from render_wait import WaitStrategy
+from response_capture import ResponseCapture
+from request_blocking import request_blocker
+
+
+class AsyncRenderer:
+    def __init__(self, pages: int = 4, max_navigations: int = 50, headless: bool = True):
+        """
+        pages: concurrent pages rendered over the one shared browser
+        max_navigations: page loads before a page's context is recycled
+        """
+        self.pages = pages
+        self.max_navigations = max_navigations
+        self.headless = headless
+        self.rendered = 0
+        self._playwright = None
+        self._browser = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._created = 0
+        self._start_lock = asyncio.Lock()
+
+    async def _ensure_browser(self) -> None:
+        async with self._start_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                if self._idle is None:
+                    self._idle = asyncio.Queue()
+                # Pages of a crashed browser are dropped; fresh ones are made on demand
+                self._created = 0
+                while not self._idle.empty():
+                    await self._discard(self._idle.get_nowait())
+
+    async def _new_slot(self) -> Dict[str, Any]:
+        context = await self._browser.new_context(
+            user_agent=random.choice(UA_LIST),
+            viewport={
+                "width": random.randint(1200, 1600),
+                "height": random.randint(700, 900),
+            },
+            bypass_csp=True,
+        )
+        if request_blocker.enabled:
+            await context.route("**/*", request_blocker.handle_async)
+        return {"browser": self._browser, "context": context, "page": await context.new_page(), "navigations": 0}
+
+    @staticmethod
+    async def _discard(slot: Optional[Dict[str, Any]]) -> None:
+        if slot is None:
+            return
+        try:
+            await slot["context"].close()
+        except Exception:
+            pass
+
+    async def _checkout(self) -> Dict[str, Any]:
+        # Create pages lazily up to the limit, then wait for one to come back.
+        # None in the queue means "a page was dropped": look again, maybe relaunching.
+        while True:
+            try:
+                await self._ensure_browser()
+                if self._idle.empty() and self._created < self.pages:
+                    self._created += 1
+                    try:
+                        return await self._new_slot()
+                    except Exception:
+                        self._created -= 1
+                        raise
+            except Exception:
+                # Pass the turn on, or a caller parked on the queue waits for a
+                # page this one never made
+                if self._idle is not None:
+                    self._idle.put_nowait(None)
+                raise
+
+            slot = await self._idle.get()
+            if slot is not None and slot["browser"] is self._browser:
+                return slot
+            await self._discard(slot)
+
+    async def _checkin(self, slot: Dict[str, Any], healthy: bool) -> None:
+        if slot["browser"] is not self._browser:
+            # Its browser crashed and was relaunched; the new pool never counted it
+            await self._discard(slot)
+            self._idle.put_nowait(None)
+            return
+
+        slot["navigations"] += 1
+        if healthy and slot["navigations"] < self.max_navigations:
+            self._idle.put_nowait(slot)
+            return
+
+        await self._discard(slot)
+        try:
+            self._idle.put_nowait(await self._new_slot())
+        except Exception:
+            self._created -= 1
+            self._idle.put_nowait(None)
+
+    async def render(self, url: str, wait_selector: Optional[str] = None,
+                     delay: float = 0.0, wait: Optional[WaitStrategy] = None,
+                     extractor: Optional[BrowserExtractor] = None,
+                     capture: Optional[ResponseCapture] = None) -> Union[str, PageExtract, None]:
+        """
+        Rendered HTML of url, using one of the shared pages.
+        wait / extractor / capture: as for fetch_rendered_html
+        """
+        for source in (capture, extractor):
+            if source is not None:
+                extracted = source.cached(url)
+                if extracted is not None:
+                    return extracted
+
+        cached = response_cache.get(url, kind="rendered")
+        if cached is not None:
+            return cached
+
+        if response_cache.replay:
+            print(f"[cache] Replay miss (no browser): {url}")
+            return None
+
+        if wait is None:
+            wait = WaitStrategy.from_config(None, wait_selector) if wait_selector else WaitStrategy()
+
+        await rate_limiter.acquire_async(url)
+
+        slot = None
+        healthy = False
+
+        try:
+            slot = await self._checkout()
+            page = slot["page"]
+            recorder = capture.start(page) if capture is not None else None
+
+            # --- NAVIGATION ---
+            try:
+                await page.goto(url, timeout=25000, wait_until=wait.wait_until)
+            except Exception as nav_err:
+                if recorder is not None:
+                    recorder.detach()
+                print(f"[Playwright] Navigation error: {nav_err}")
+                return None
+
+            # --- CAPTURED JSON (NO DOM NEEDED) ---
+            extracted = None
+            if recorder is not None:
+                extracted = await capture.stop_async(page, recorder, url, wait)
+
+            if extracted is None:
+                # --- WAIT FOR CONTENT ---
+                await wait.wait_async(page)
+
+                # --- OPTIONAL POST-LOAD DELAY ---
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                if extractor is not None:
+                    extracted = await extractor.extract_async(page, url)
+
+            html = extracted if extracted is not None else await page.content()
+            healthy = True
+
+        except Exception as e:
+            print(f"[Playwright] Failed to fetch {url}: {e}")
+            return None
+
+        finally:
+            if slot is not None:
+                await self._checkin(slot, healthy)
+
+        self.rendered += 1
+        if isinstance(html, str):
+            response_cache.put(url, html, kind="rendered")
+        return html
+
+    async def close(self) -> None:
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
@@ -0,0 +1,234 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from cache import response_cache, parse_scope
+from document import as_document
+from parse_pool import parse_pool
+from parsing import parse_listing
+
+# Soupsieve-only syntax the browser's querySelector rejects
+SOUP_ONLY_SELECTORS = (":contains(", ":-soup-")
+
+# bs4 returns these as lists, so .get(attr).strip() behaves differently there
+MULTI_VALUED_ATTRS = {"class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"}
+
+# Mirrors parse_items / find_next_page: str.strip() whitespace, get_text(strip=True)
+# over the strings bs4 considers text (not script/style/template/rt/rp contents)
+EXTRACT_SCRIPT = r"""
+(spec) => {
+    const WS = "[\\t\\n\\x0b\\x0c\\r\\x1c-\\x1f \\x85\\xa0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000]";
+    const TRIM = new RegExp("^" + WS + "+|" + WS + "+$", "g");
+    const SPLIT = new RegExp(WS + "+");
+    const CONTAINERS = new Set(["script", "style", "template", "rt", "rp"]);
+
+    const strip = (s) => s.replace(TRIM, "");
+    const container = (el) => {
+        for (let n = el; n; n = n.parentElement) {
+            if (CONTAINERS.has(n.localName)) return n.localName;
+        }
+        return null;
+    };
+    const text = (el) => {
+        const own = CONTAINERS.has(el.localName) ? el.localName : null;
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        const parts = [];
+        for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+            if (container(node.parentElement) !== own) continue;
+            const s = strip(node.data);
+            if (s) parts.push(s);
+        }
+        return parts.join("");
+    };
+    const value = (el, [name, selector, mode, param]) => {
+        if (mode === "attr") return strip(el.getAttribute(param) ?? "");
+        if (mode === "class") {
+            const classes = (el.getAttribute("class") ?? "").split(SPLIT).filter(Boolean);
+            return classes.find((c) => !param.includes(c)) ?? "";
+        }
+        return text(el);
+    };
+
+    try {
+        const items = [];
+        for (const block of document.querySelectorAll(spec.item_selector)) {
+            const record = {};
+            for (const field of spec.fields) {
+                const el = block.querySelector(field[1]);
+                record[field[0]] = el ? value(el, field) : null;
+            }
+            items.push(record);
+        }
+
+        let next = null;
+        if (spec.pagination) {
+            const el = document.querySelector(spec.pagination.selector);
+            if (el) next = strip(el.getAttribute(spec.pagination.attr) ?? "");
+        }
+        return {items, next};
+    } catch (e) {
+        return {error: String(e)};
+    }
+}
+"""
+
+
+class PageExtract:
+    """
+    Records and next-page URL of a listing, extracted inside the browser.
+    Stands in for the HTML a fetch would otherwise return.
+    """
+
+    def __init__(self, url: str, items: List[Dict[str, Any]], next_url: Optional[str]):
+        self.url = url
+        self.items = items
+        self.next_url = next_url
+
+
+def compile_extraction(config: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Turn the list rules of a site config into the EXTRACT_SCRIPT argument.
+    Returns (spec, None), or (None, reason) when a rule can only run in Python.
+    """
+    selectors = [config["item_selector"]] + [r["selector"] for r in config["fields"].values()]
+    pagination = config.get("pagination")
+    if pagination:
+        selectors.append(pagination["selector"])
+
+    for selector in selectors:
+        if any(token in selector for token in SOUP_ONLY_SELECTORS):
+            return None, f"selector '{selector}' is soupsieve-only"
+
+    fields = []
+    for name, rules in config["fields"].items():
+        # Same precedence as parse_items
+        if "attr" in rules:
+            if rules["attr"].lower() in MULTI_VALUED_ATTRS:
+                return None, f"attr '{rules['attr']}' is multi-valued in bs4"
+            fields.append([name, rules["selector"], "attr", rules["attr"]])
+        elif rules.get("text"):
+            fields.append([name, rules["selector"], "text", None])
+        elif "class_exclude" in rules:
+            fields.append([name, rules["selector"], "class", list(rules["class_exclude"])])
+        else:
+            fields.append([name, rules["selector"], "text", None])
+
+    spec = {"item_selector": config["item_selector"], "fields": fields, "pagination": None}
+    if pagination:
+        spec["pagination"] = {"selector": pagination["selector"], "attr": pagination.get("attr", "href")}
+
+    return spec, None
+
+
+class BrowserExtractor:
+    def __init__(self):
+        self.spec: Optional[Dict[str, Any]] = None
+        self.base_url = ""
+        self.extracted = 0
+        self.fallbacks = 0
+        self._absolute: List[str] = []
+        self._cache_kind = ""
+
+    @property
+    def enabled(self) -> bool:
+        return self.spec is not None
+
+    def configure(self, config: Dict[str, Any], base_url: str) -> None:
+        """
+        render.extract: "browser" runs the list rules in the page; anything
+        the browser can't reproduce exactly stays on the HTML path.
+        """
+        self.spec = None
+        if config.get("render", {}).get("extract") != "browser":
+            return
+
+        spec, reason = compile_extraction(config)
+        if spec is None:
+            print(f"[extract] In-browser extraction disabled: {reason}")
+            return
+
+        self.spec = spec
+        self.base_url = base_url
+        self._absolute = [name for name, rules in config["fields"].items() if rules.get("absolute")]
+        self._cache_kind = parse_scope("extract", spec)
+
+    def _result(self, url: str, raw: Dict[str, Any]) -> PageExtract:
+        # Missing elements come back as null: "" and, like parse_items, never urljoin'ed
+        items = raw["items"]
+        for item in items:
+            for name, value in item.items():
+                if value is None:
+                    item[name] = ""
+                elif name in self._absolute:
+                    item[name] = urljoin(self.base_url, value)
+
+        next_url = raw["next"]
+        if next_url is not None:
+            next_url = urljoin(self.base_url, next_url)
+
+        return PageExtract(url, items, next_url)
+
+    def cached(self, url: str) -> Optional[PageExtract]:
+        body = response_cache.get(url, kind=self._cache_kind)
+        if body is None:
+            return None
+        return self._result(url, json.loads(body))
+
+    def finish(self, url: str, raw: Any) -> Optional[PageExtract]:
+        """
+        PageExtract from the script's result, or None to fall back to the HTML.
+        """
+        if not isinstance(raw, dict) or "error" in raw:
+            error = raw.get("error") if isinstance(raw, dict) else f"unexpected result {raw!r}"
+            self.fallbacks += 1
+            print(f"[extract] In-page extraction failed ({error}); parsing HTML instead")
+            return None
+
+        self.extracted += 1
+        response_cache.put(url, json.dumps(raw), kind=self._cache_kind)
+        return self._result(url, raw)
+
+    def extract(self, page, url: str) -> Optional[PageExtract]:
+        """
+        Run on a playwright.sync_api page that has finished loading.
+        """
+        try:
+            raw = page.evaluate(EXTRACT_SCRIPT, self.spec)
+        except Exception as e:
+            raw = {"error": str(e)}
+        return self.finish(url, raw)
+
+    async def extract_async(self, page, url: str) -> Optional[PageExtract]:
+        try:
+            raw = await page.evaluate(EXTRACT_SCRIPT, self.spec)
+        except Exception as e:
+            raw = {"error": str(e)}
+        return self.finish(url, raw)
+
+    def stats(self) -> Dict[str, int]:
+        return {"extracted": self.extracted, "fallbacks": self.fallbacks}
+
+
+def parse_list_page(url: str, page: Any, config: Dict[str, Any],
+                    base_url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    (items, next_url) of a listing, whether it arrived as HTML or as an in-browser extract.
+    """
+    if isinstance(page, PageExtract):
+        return page.items, page.next_url
+
+    # Items and pagination come from one pass (or one tree); an unchanged page reuses both
+    doc = as_document(page, url)
+
+    def parse() -> Dict[str, Any]:
+        if parse_pool.enabled:
+            return parse_pool.parse("list", url, doc)
+        items, next_url = parse_listing(doc, config, base_url)
+        return {"items": items, "next": next_url}
+
+    parsed = response_cache.memo_parse(url, doc, parse_scope("list_page", config, base_url), parse)
+    return parsed["items"], parsed["next"]
+
+
+# List-page extraction for rendered listings of the current site config
+browser_extractor = BrowserExtractor()
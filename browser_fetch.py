@@ -1,68 +1,91 @@
-from playwright.sync_api import sync_playwright
+from browser_extract import BrowserExtractor, PageExtract
+from browser_pool import browser_pool
+from cache import response_cache
+from rate_limiter import rate_limiter
+from render_wait import WaitStrategy
+from response_capture import ResponseCapture
 import time
-import random
 
-def fetch_rendered_html(url: str, wait_selector: str = None, delay: float = 0.0) -> str | None:
+
+def fetch_rendered_html(url: str, wait_selector: str = None, delay: float = 0.0,
+                        wait: WaitStrategy = None,
+                        extractor: BrowserExtractor = None,
+                        capture: ResponseCapture = None) -> str | PageExtract | None:
     """
     Fetch fully rendered HTML of a JS-driven page using Playwright.
     Includes:
-    - realistic user-agent + viewport
-    - optional selector wait
+    - long-lived browsers from the shared pool (no launch per URL)
+    - realistic user-agent + viewport (per recycled context)
+    - content-aware wait (selector count / quiet DOM) instead of networkidle;
+      wait_selector alone means "wait until it matches"
     - optional post-load delay
-    - proper cleanup on exceptions
+    - response cache lookup (rendered HTML is cached separately from static)
+    - with an extractor, records + next URL pulled out in the page (a
+      PageExtract) instead of the serialized DOM
+    - with a capture, records mapped from the page's own JSON responses;
+      the DOM is waited for only to read the next link when the capture
+      has no "next" path
     """
 
-    try:
-        with sync_playwright() as p:
-
-            # --- RANDOMIZE USER AGENT + VIEWPORT ---
-            ua_list = [
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
-                "(KHTML, like Gecko) Version/17.0 Safari/605.1.15",
-                "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/120.0.6099.224 Safari/537.36",
-            ]
-
-            context = p.chromium.launch(headless=True).new_context(
-                user_agent=random.choice(ua_list),
-                viewport={
-                    "width": random.randint(1200, 1600),
-                    "height": random.randint(700, 900),
-                },
-                bypass_csp=True,  # Helps with restrictive sites
-            )
-
-            page = context.new_page()
-
-            # --- NAVIGATION ---
-            try:
-                page.goto(url, timeout=25000, wait_until="networkidle")
-            except Exception as nav_err:
-                page.screenshot(path="error_nav.png")
-                print(f"[Playwright] Navigation error: {nav_err} (screenshot saved)")
-                context.close()
-                return None
-
-            # --- OPTIONAL WAIT FOR CONTENT ---
-            if wait_selector:
-                try:
-                    page.wait_for_selector(wait_selector, timeout=12000)
-                except Exception:
-                    print(f"[Playwright] Selector '{wait_selector}' not found; continuing anyway.")
-
-            # --- OPTIONAL POST-LOAD DELAY ---
-            if delay > 0:
-                time.sleep(delay)
-
-            # --- GET CONTENT ---
-            html = page.content()
-
-            # --- CLEANUP ---
-            context.close()
-            return html
+    for source in (capture, extractor):
+        if source is not None:
+            extracted = source.cached(url)
+            if extracted is not None:
+                return extracted
+
+    cached = response_cache.get(url, kind="rendered")
+    if cached is not None:
+        return cached
+
+    if response_cache.replay:
+        print(f"[cache] Replay miss (no browser): {url}")
+        return None
+
+    if wait is None:
+        wait = WaitStrategy.from_config(None, wait_selector) if wait_selector else WaitStrategy()
+
+    rate_limiter.acquire(url)
+
+    def render(page) -> str | PageExtract | None:
+        recorder = capture.start(page) if capture is not None else None
 
+        # --- NAVIGATION ---
+        try:
+            page.goto(url, timeout=25000, wait_until=wait.wait_until)
+        except Exception as nav_err:
+            if recorder is not None:
+                recorder.detach()
+            page.screenshot(path="error_nav.png")
+            print(f"[Playwright] Navigation error: {nav_err} (screenshot saved)")
+            return None
+
+        # --- CAPTURED JSON (NO DOM NEEDED) ---
+        if recorder is not None:
+            captured = capture.stop(page, recorder, url, wait)
+            if captured is not None:
+                return captured
+
+        # --- WAIT FOR CONTENT ---
+        wait.wait(page)
+
+        # --- OPTIONAL POST-LOAD DELAY ---
+        if delay > 0:
+            time.sleep(delay)
+
+        # --- GET CONTENT ---
+        if extractor is not None:
+            extracted = extractor.extract(page, url)
+            if extracted is not None:
+                return extracted
+
+        return page.content()
+
+    try:
+        html = browser_pool.run(render)
     except Exception as e:
         print(f"[Playwright] Failed to fetch {url}: {e}")
         return None
+
+    if isinstance(html, str):
+        response_cache.put(url, html, kind="rendered")
+    return html
@@ -0,0 +1,207 @@
+import atexit
+import queue
+import random
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+from playwright.sync_api import sync_playwright
+
+from request_blocking import request_blocker
+
+UA_LIST = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.0 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.6099.224 Safari/537.36",
+]
+
+# JS heap of the current page in bytes (Chromium only; 0 elsewhere)
+HEAP_SCRIPT = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+_STOP = object()
+
+
+class BrowserWorker(threading.Thread):
+    """
+    Owns one browser for its whole life. Sync Playwright objects are bound to
+    the thread that created them, so every job for this browser runs here.
+    """
+
+    def __init__(self, pool: "BrowserPool", index: int):
+        super().__init__(name=f"browser-worker-{index}", daemon=True)
+        self.pool = pool
+        self.navigations = 0
+        self.contexts_used = 0
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+
+    def _launch(self) -> None:
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.pool.headless)
+        self.pool.launches += 1
+
+    def _new_context(self) -> None:
+        self._context = self._browser.new_context(
+            user_agent=random.choice(UA_LIST),
+            viewport={
+                "width": random.randint(1200, 1600),
+                "height": random.randint(700, 900),
+            },
+            bypass_csp=True,  # Helps with restrictive sites
+        )
+        if request_blocker.enabled:
+            self._context.route("**/*", request_blocker.handle)
+        self._page = self._context.new_page()
+        self.navigations = 0
+        self.contexts_used += 1
+
+    def _close_context(self) -> None:
+        if self._context is not None:
+            try:
+                self._context.close()
+            except Exception:
+                pass
+        self._context = None
+        self._page = None
+
+    def _close_browser(self) -> None:
+        self._close_context()
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+
+    def _page_for_job(self):
+        if self._browser is None or not self._browser.is_connected():
+            self._close_browser()
+            self._launch()
+        if self._page is None or self._page.is_closed():
+            self._close_context()
+            self._new_context()
+        return self._page
+
+    def _heap_mb(self) -> float:
+        try:
+            return self._page.evaluate(HEAP_SCRIPT) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def _maybe_recycle(self) -> None:
+        # Fresh context after N navigations or once the page heap grows too big;
+        # a fresh browser process after enough contexts
+        self.navigations += 1
+        if self.navigations < self.pool.max_navigations and self._heap_mb() < self.pool.max_memory_mb:
+            return
+
+        self._close_context()
+        self.pool.recycles += 1
+
+        if self.contexts_used >= self.pool.contexts_per_browser:
+            self._close_browser()
+            self.contexts_used = 0
+
+    def run(self) -> None:
+        while True:
+            job = self.pool._jobs.get()
+            if job is _STOP:
+                break
+
+            func, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                page = self._page_for_job()
+                result = func(page)
+            except Exception as e:
+                future.set_exception(e)
+                # A failed job may leave the page in a bad state; start clean
+                self._close_context()
+                continue
+
+            future.set_result(result)
+            self._maybe_recycle()
+
+        self._close_browser()
+        if self._playwright is not None:
+            self._playwright.stop()
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        workers: int = 1,
+        max_navigations: int = 50,
+        max_memory_mb: float = 512.0,
+        contexts_per_browser: int = 20,
+        headless: bool = True,
+    ):
+        """
+        workers: browsers kept alive, one per worker thread
+        max_navigations: page loads before a context/page is recycled
+        max_memory_mb: JS heap size that forces a context recycle
+        contexts_per_browser: context recycles before the browser itself is relaunched
+        """
+        self.workers = workers
+        self.max_navigations = max_navigations
+        self.max_memory_mb = max_memory_mb
+        self.contexts_per_browser = contexts_per_browser
+        self.headless = headless
+        self.launches = 0
+        self.recycles = 0
+        self._jobs: "queue.Queue[Any]" = queue.Queue()
+        self._threads: List[BrowserWorker] = []
+        self._lock = threading.Lock()
+
+    def configure(self, **settings: Any) -> None:
+        for name, value in settings.items():
+            if value is not None:
+                setattr(self, name, value)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            while len(self._threads) < self.workers:
+                worker = BrowserWorker(self, len(self._threads))
+                worker.start()
+                self._threads.append(worker)
+
+    def submit(self, func: Callable[[Any], Any]) -> Future:
+        """
+        Run func(page) on the next free browser worker.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._jobs.put((func, future))
+        return future
+
+    def run(self, func: Callable[[Any], Any], timeout: Optional[float] = None) -> Any:
+        return self.submit(func).result(timeout)
+
+    def close_all(self) -> None:
+        """
+        Shut every worker down; each closes its own browser on its own thread.
+        """
+        with self._lock:
+            threads = list(self._threads)
+            self._threads.clear()
+
+        for _ in threads:
+            self._jobs.put(_STOP)
+        for thread in threads:
+            thread.join(timeout=30)
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "launches": self.launches, "recycles": self.recycles}
+
+
+# Shared by every rendered fetch; closed on interpreter exit if main didn't
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close_all)
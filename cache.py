@@ -0,0 +1,305 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from hashlib import sha1
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from document import Document, Page
+
+CACHE_MODES = ("off", "read-write", "read-only")
+
+# Request headers that change the response body and so belong in the cache key
+KEY_HEADERS = ("accept", "accept-language")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for cache keys: lowercase scheme/host, no default
+    port, no fragment, query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def parse_scope(name: str, *settings: Any) -> str:
+    """
+    memo_parse scope: parser name plus a digest of the settings that shape its output.
+    """
+    blob = json.dumps(settings, sort_keys=True, default=str)
+    return f"{name}:{sha1(blob.encode('utf-8')).hexdigest()[:16]}"
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: str = ".scrape_cache/responses.sqlite",
+        mode: str = "off",
+        ttl: float = 86400.0,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        path: sqlite file holding the compressed bodies
+        mode: off, read-write, or read-only (replay: no network, TTL ignored)
+        ttl: seconds an entry stays fresh in read-write mode
+        max_bytes: cap on stored (compressed) bytes; least recently used entries go first
+        """
+        self.path = path
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.parse_reused = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def configure(self, mode: Optional[str] = None, path: Optional[str] = None,
+                  ttl: Optional[float] = None, max_bytes: Optional[int] = None) -> None:
+        if mode is not None:
+            if mode not in CACHE_MODES:
+                raise ValueError(f"Unknown cache mode: {mode}")
+            self.mode = mode
+        if path is not None and path != self.path:
+            self.close()
+            self.path = path
+        if ttl is not None:
+            self.ttl = ttl
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "read-only"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, url TEXT, body BLOB, size INTEGER,"
+                " meta TEXT, stored_at REAL, accessed_at REAL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " key TEXT PRIMARY KEY, digest TEXT, record TEXT, url TEXT)"
+            )
+            # Records are evicted with their URL's responses, so older files get the url column;
+            # their url-less rows can't be matched to a response and are dropped
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(records)")]
+            if "url" not in columns:
+                self._db.execute("ALTER TABLE records ADD COLUMN url TEXT")
+                self._db.execute("DELETE FROM records")
+            self._db.execute("CREATE INDEX IF NOT EXISTS records_url ON records (url)")
+            self._db.commit()
+            row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+            self._total_bytes = row[0]
+        return self._db
+
+    @staticmethod
+    def key(url: str, kind: str = "static", headers: Optional[Dict[str, str]] = None) -> str:
+        parts = [kind, normalize_url(url)]
+        lowered = {k.lower(): v for k, v in (headers or {}).items()}
+        for name in KEY_HEADERS:
+            if name in lowered:
+                parts.append(f"{name}={lowered[name]}")
+        return sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str, kind: str = "static",
+               headers: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        Return the stored entry (body, meta, stored_at, fresh) regardless of age.
+        Stale entries count as misses but are still returned for revalidation.
+        """
+        if not self.enabled:
+            return None
+
+        key = self.key(url, kind, headers)
+        with self._lock:
+            db = self._connect()
+            row = db.execute(
+                "SELECT body, meta, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+
+            body, meta, stored_at = row
+            fresh = self.replay or time.time() - stored_at < self.ttl
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return {
+            "body": zlib.decompress(body).decode("utf-8"),
+            "meta": json.loads(meta) if meta else {},
+            "stored_at": stored_at,
+            "fresh": fresh,
+        }
+
+    def is_fresh(self, url: str, kind: str = "static",
+                 headers: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Whether get() would answer this URL now. Counts nothing and leaves the
+        LRU order alone.
+        """
+        if not self.enabled:
+            return False
+
+        key = self.key(url, kind, headers)
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and (self.replay or time.time() - row[0] < self.ttl)
+
+    def get(self, url: str, kind: str = "static",
+            headers: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        Fresh body for this URL, or None. Replay mode serves entries of any age.
+        """
+        if not self.enabled:
+            return None
+
+        entry = self.lookup(url, kind, headers)
+        if entry is None or not entry["fresh"]:
+            return None
+        return entry["body"]
+
+    def put(self, url: str, body: str, kind: str = "static",
+            headers: Optional[Dict[str, str]] = None, meta: Optional[Dict] = None) -> None:
+        if not self.enabled or self.replay:
+            return
+
+        key = self.key(url, kind, headers)
+        blob = zlib.compress(body.encode("utf-8"), 6)
+        now = time.time()
+
+        with self._lock:
+            db = self._connect()
+            old = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, blob, len(blob), json.dumps(meta or {}), now, now),
+            )
+            self._total_bytes += len(blob) - (old[0] if old else 0)
+            self._evict(db)
+            db.commit()
+
+    def refresh(self, url: str, kind: str = "static",
+                headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        Mark a stored entry fresh again after a 304 Not Modified.
+        """
+        if not self.enabled or self.replay:
+            return
+
+        key = self.key(url, kind, headers)
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+            db.commit()
+            self.revalidated += 1
+
+    def memo_parse(self, url: str, body: Page, scope: str, parse: Callable[[], Any]) -> Any:
+        """
+        Reuse the record parsed from an identical body of this URL, else parse and store.
+        scope separates different parsers/configs run over the same page.
+        """
+        if not self.enabled:
+            return parse()
+
+        normalized = normalize_url(url)
+        key = sha1(f"{scope}\n{normalized}".encode("utf-8")).hexdigest()
+        digest = sha1(body.raw if isinstance(body, Document) else body.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT digest, record FROM records WHERE key = ?", (key,)
+            ).fetchone()
+            reused = row is not None and row[0] == digest
+            if reused:
+                self.parse_reused += 1
+
+        if reused:
+            return json.loads(row[1])
+
+        record = parse()
+
+        if not self.replay:
+            with self._lock:
+                db = self._connect()
+                db.execute(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                    (key, digest, json.dumps(record), normalized),
+                )
+                db.commit()
+
+        return record
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        # Drop least recently used entries until back under 90% of the cap
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        target = self.max_bytes * 0.9
+        rows = db.execute("SELECT key, url, size FROM responses ORDER BY accessed_at").fetchall()
+        for key, url, size in rows:
+            if self._total_bytes <= target:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            # Records parsed from this URL's pages go with it
+            db.execute("DELETE FROM records WHERE url = ?", (normalize_url(url),))
+            self._total_bytes -= size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "parse_reused": self.parse_reused,
+                "bytes": self._total_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# Shared by fetch.fetch_url and browser_fetch.fetch_rendered_html
+response_cache = ResponseCache()
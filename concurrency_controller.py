@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+RATE_LIMIT_STATUSES = (429, 503)
+
+
+def percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(len(ordered) * pct), len(ordered) - 1)
+    return ordered[index]
+
+
+class HostState:
+    def __init__(self, limit: float, window: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.since_change = 0
+        self.last_decrease = 0.0
+        self.window = window
+        # Per page kind ("list", "detail", ...): a slower kind is not congestion
+        self.baselines: Dict[str, float] = {}
+        self.latencies: Dict[str, Deque[float]] = {}
+
+    def window_for(self, kind: str) -> Deque[float]:
+        samples = self.latencies.get(kind)
+        if samples is None:
+            samples = self.latencies[kind] = deque(maxlen=self.window)
+        return samples
+
+    def all_latencies(self) -> List[float]:
+        return [latency for samples in self.latencies.values() for latency in samples]
+
+
+class AIMDController:
+    def __init__(
+        self,
+        initial: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+        latency_floor: float = 0.1,
+        window: int = 50,
+        baseline_weight: float = 0.2,
+    ):
+        """
+        initial / min_limit / max_limit: per-host concurrency bounds
+        increase: added to the limit after a full window of healthy responses
+        decrease: multiplier applied on 429/503 or when latency climbs
+        latency_factor: p90 latency above baseline * factor counts as overload
+        latency_floor: ignore latency rises smaller than this many seconds
+        window: number of recent latencies kept per host and page kind
+        baseline_weight: EWMA weight of each new p50 in the latency baseline,
+                         so the baseline follows a lasting shift up or down
+        """
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_floor = latency_floor
+        self.window = window
+        self.baseline_weight = baseline_weight
+        self._hosts: Dict[str, HostState] = {}
+        self._cond = threading.Condition()
+
+    def configure(self, **settings: Any) -> None:
+        with self._cond:
+            for name, value in settings.items():
+                if value is not None:
+                    setattr(self, name, value)
+            self._hosts.clear()
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = HostState(self.initial, self.window)
+            self._hosts[host] = state
+        return state
+
+    def limit(self, url: str) -> int:
+        with self._cond:
+            return max(int(self._state(self.host(url)).limit), self.min_limit)
+
+    @contextmanager
+    def slot(self, url: str):
+        """
+        Block the calling thread while the host is at its concurrency limit.
+        """
+        host = self.host(url)
+
+        with self._cond:
+            state = self._state(host)
+            self._cond.wait_for(lambda: state.in_flight < max(int(state.limit), self.min_limit))
+            state.in_flight += 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                state.in_flight -= 1
+                self._cond.notify_all()
+
+    def _cut(self, state: HostState) -> None:
+        # At most one cut per round-trip, so one burst of 429s doesn't collapse the limit
+        now = time.monotonic()
+        if now - state.last_decrease < max(percentile(state.all_latencies(), 0.5), 0.5):
+            return
+
+        state.limit = max(self.min_limit, state.limit * self.decrease)
+        state.last_decrease = now
+        state.since_change = 0
+        # Samples from before the cut describe the old limit; judge the new one on its own
+        for samples in state.latencies.values():
+            samples.clear()
+
+    def record(self, url: str, status: Optional[int], latency: float, kind: Optional[str] = None) -> None:
+        """
+        Feed one response outcome (status None = network error) into the host's
+        limit. Latencies are compared per page kind ("list" / "detail").
+        """
+        with self._cond:
+            state = self._state(self.host(url))
+
+            if status in RATE_LIMIT_STATUSES:
+                state.rate_limited += 1
+                self._cut(state)
+                return
+
+            if status is None or status >= 500:
+                state.failures += 1
+                return
+
+            state.successes += 1
+            kind = kind or "page"
+            samples = state.window_for(kind)
+            samples.append(latency)
+
+            if len(samples) >= 5:
+                p50 = percentile(samples, 0.5)
+                baseline = state.baselines.get(kind)
+                if baseline is None:
+                    baseline = p50
+                else:
+                    baseline += self.baseline_weight * (p50 - baseline)
+                state.baselines[kind] = baseline
+
+                threshold = max(baseline * self.latency_factor, baseline + self.latency_floor)
+                if percentile(samples, 0.9) > threshold:
+                    self._cut(state)
+                    return
+
+            # Additive increase: one step per limit's worth of healthy responses
+            state.since_change += 1
+            if state.since_change >= state.limit and state.limit < self.max_limit:
+                state.limit = min(self.max_limit, state.limit + self.increase)
+                state.since_change = 0
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {
+                host: {
+                    "limit": int(state.limit),
+                    "successes": state.successes,
+                    "rate_limited": state.rate_limited,
+                    "failures": state.failures,
+                    "p50": round(percentile(state.all_latencies(), 0.5), 3),
+                    "p90": round(percentile(state.all_latencies(), 0.9), 3),
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+# Shared by the fetch layer (outcomes + thread gating) and the async scheduler
+concurrency_controller = AIMDController()
@@ -0,0 +1,71 @@
+from typing import Dict, Any, Optional
+from parsing import parse_detail_record
+from parse_pool import parse_pool
+from site_config import compile_fields
+from smart_fetch import smart_fetch
+from cache import response_cache, parse_scope
+from document import Page, as_document
+from item_filter import item_filter
+from retry_queue import RetryLater, RetryQueue
+
+
+def fetch_detail(detail_url: str, detail_fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Fetch and parse one detail page.
+    Transient fetch failures propagate as RetryLater.
+    """
+    detail_html = smart_fetch(detail_url, "detail")
+    if detail_html is None:
+        print(f"[WARN] Failed to fetch detail page: {detail_url}")
+        return None
+
+    return parse_detail(detail_url, detail_html, detail_fields)
+
+
+def parse_detail(detail_url: str, detail_html: Page, detail_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Table rows plus detail_fields, parsed in a worker process when the parse
+    pool is on.
+    """
+    doc = as_document(detail_html, detail_url)
+
+    def parse():
+        if parse_pool.enabled:
+            return parse_pool.parse("detail", detail_url, doc)
+        return parse_detail_record(doc, detail_fields)
+
+    # Unchanged page (e.g. a 304 revalidation) -> reuse the stored record
+    table = compile_fields(detail_fields).table
+    return response_cache.memo_parse(
+        detail_url, doc, parse_scope("detail", detail_fields, table.settings if table else False), parse
+    )
+
+
+def detail_job(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {"url": item["url"], "kind": "detail", "item": item}
+
+
+def run_detail_job(job: Dict[str, Any], detail_fields: Dict[str, Any], retries: RetryQueue) -> bool:
+    """
+    One attempt at a detail job. Transient failures go back on the retry
+    queue; permanent ones are dead-lettered. Merges into the item on success.
+    """
+    try:
+        data = fetch_detail(job["url"], detail_fields)
+    except RetryLater as e:
+        retries.defer(job, e)
+        return False
+
+    if data is None:
+        retries.dead_letter(job, "fetch failed")
+        return False
+
+    merge_detail(job["item"], data)
+    return True
+
+
+def merge_detail(item: Dict[str, Any], data: Dict[str, Any]) -> None:
+    # The record is complete now; "unseen" filters skip it on later runs
+    item.update(data)
+    item_filter.remember([item])
+
@@ -0,0 +1,68 @@
+from typing import Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from structured_data import StructuredData
+
+
+class Document:
+    """
+    One fetched page: raw bytes, decoded text and a BeautifulSoup tree built
+    on first use and then shared by every extractor that reads the page.
+    """
+
+    def __init__(self, text: str, url: str = "", raw: Optional[bytes] = None):
+        self.text = text
+        self.url = url
+        self._raw = raw
+        self._soup: Optional[BeautifulSoup] = None
+        self._scoped: Optional[Tuple[SoupStrainer, BeautifulSoup]] = None
+        self._structured: Optional[StructuredData] = None
+
+    @property
+    def raw(self) -> bytes:
+        if self._raw is None:
+            self._raw = self.text.encode("utf-8")
+        return self._raw
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.text, "html.parser")
+        return self._soup
+
+    def scoped_soup(self, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+        """
+        A tree of just the parse_only regions, or the full tree if there is no
+        strainer or the full tree is already built anyway.
+        """
+        if parse_only is None or self._soup is not None:
+            return self.soup
+        if self._scoped is None or self._scoped[0] is not parse_only:
+            self._scoped = (parse_only, BeautifulSoup(self.text, "html.parser", parse_only=parse_only))
+        return self._scoped[1]
+
+    @property
+    def structured(self) -> StructuredData:
+        # JSON-LD / app-state JSON, read from the script blocks without a tree
+        if self._structured is None:
+            self._structured = StructuredData(self.text)
+        return self._structured
+
+    @property
+    def parsed(self) -> bool:
+        return self._soup is not None
+
+    def __str__(self) -> str:
+        return self.text
+
+
+Page = Union[str, Document]
+
+
+def as_document(page: Page, url: str = "") -> Document:
+    return page if isinstance(page, Document) else Document(page, url)
+
+
+def text_of(page: Page) -> str:
+    return page.text if isinstance(page, Document) else page
@@ -1,8 +1,12 @@
 import requests
 import time
-import random
 from typing import Optional
 from proxy_manager import ProxyManager
+from session_pool import SessionPool
+from cache import response_cache
+from rate_limiter import rate_limiter
+from concurrency_controller import concurrency_controller
+from retry_queue import RetryLater, parse_retry_after
 
 HEADERS = {
     "User-Agent": (
@@ -19,40 +23,101 @@ PROXIES = [
 
 proxy_manager = ProxyManager(PROXIES) if PROXIES else None
 
+# Keep-alive sessions shared by every caller of fetch_url (list + detail pages)
+session_pool = SessionPool(HEADERS)
 
-def fetch_url(url: str, max_retries: int = 3) -> Optional[str]:
-    for attempt in range(1, max_retries + 1):
-        proxy = proxy_manager.get_proxy() if proxy_manager else None
 
-        proxies = {"http": proxy, "https": proxy} if proxy else None
+def conditional_headers(entry: Optional[dict]) -> dict:
+    """
+    If-None-Match / If-Modified-Since from the validators stored with a cache entry.
+    """
+    if not entry:
+        return {}
 
-        try:
-            response = requests.get(
-                url,
-                headers=HEADERS,
-                proxies=proxies,
-                timeout=10,
-            )
+    headers = {}
+    meta = entry["meta"]
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
 
-            # Adaptive throttling
-            if response.status_code in (429, 503):
-                raise requests.HTTPError(f"Rate limited ({response.status_code})")
 
-            response.raise_for_status()
-            return response.text
+def served_from_cache(url: str) -> bool:
+    """
+    Whether fetch_url answers url without a request (a fresh entry, or any
+    replay), so there is no token to wait for.
+    """
+    return response_cache.replay or response_cache.is_fresh(url, headers=HEADERS)
 
-        except Exception as e:
-            print(f"[Attempt {attempt}] Fetch failed ({proxy}): {e}")
 
-            if proxy_manager and proxy:
-                proxy_manager.mark_bad(proxy)
+def fetch_url(url: str, kind: Optional[str] = None, paced: bool = False) -> Optional[str]:
+    """
+    One attempt at a static fetch. Transient failures (429/503, 5xx, network
+    errors) raise RetryLater so the caller can schedule the retry instead of
+    blocking; other failures return None. kind ("list" / "detail") keeps
+    latency baselines per page kind. paced: the caller already waited for
+    this host's token bucket (the async engine does, on its event loop).
+    """
+    entry = response_cache.lookup(url, headers=HEADERS)
+    if entry is not None and entry["fresh"]:
+        return entry["body"]
 
-            if attempt == max_retries:
-                return None
+    if response_cache.replay:
+        print(f"[cache] Replay miss (no network): {url}")
+        return None
 
-            # Adaptive backoff
-            wait = random.uniform(1.5, 4.0)
-            print(f"Cooling down for {wait:.2f}s...")
-            time.sleep(wait)
+    # Stale entry: ask the server whether it changed instead of re-downloading
+    validators = conditional_headers(entry)
 
-    return None
+    proxy = proxy_manager.get_proxy() if proxy_manager else None
+
+    session = session_pool.get_session(url, proxy)
+
+    try:
+        # Concurrency: wait while the host is at its adaptive limit
+        with concurrency_controller.slot(url):
+            # Politeness: the token is taken once admitted, so a queue behind
+            # the slot doesn't bank tokens and fire them back-to-back
+            if not paced:
+                rate_limiter.acquire(url)
+
+            started = time.monotonic()
+            try:
+                response = session.get(url, headers=validators, timeout=10)
+            except requests.RequestException:
+                concurrency_controller.record(url, None, time.monotonic() - started, kind)
+                raise
+            concurrency_controller.record(url, response.status_code, time.monotonic() - started, kind)
+
+    except requests.RequestException as e:
+        print(f"Fetch failed ({proxy}): {e}")
+        if proxy_manager and proxy:
+            proxy_manager.mark_bad(proxy)
+        raise RetryLater(url, f"network error: {e.__class__.__name__}") from e
+
+    if response.status_code == 304 and entry is not None:
+        response_cache.refresh(url, headers=HEADERS)
+        return entry["body"]
+
+    # Adaptive throttling: honor Retry-After and hold back this host's bucket for every caller
+    if response.status_code in (429, 503):
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after:
+            rate_limiter.penalize(url, retry_after)
+        if proxy_manager and proxy:
+            proxy_manager.mark_bad(proxy)
+        raise RetryLater(url, f"rate limited ({response.status_code})", retry_after)
+
+    if response.status_code >= 500:
+        raise RetryLater(url, f"server error ({response.status_code})")
+
+    if response.status_code >= 400:
+        print(f"Fetch failed ({response.status_code}): {url}")
+        return None
+
+    response_cache.put(url, response.text, headers=HEADERS, meta={
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    })
+    return response.text
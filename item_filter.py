@@ -0,0 +1,223 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Spelled-out numbers, e.g. the "Three" of a books.toscrape star rating
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+FILTER_OPS = ("min", "max", "contains", "matches")
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def as_number(value: Any) -> Optional[float]:
+    """
+    The number a listing value shows: 38.46 for "£38.46", 3 for "Three"
+    (or ["Three"]), None when there isn't one.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, list):
+        value = " ".join(str(v) for v in value)
+    if not isinstance(value, str):
+        return None
+    match = _NUMBER_RE.search(value.replace(",", ""))
+    if match:
+        return float(match.group())
+    return NUMBER_WORDS.get(value.strip().lower())
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+class FieldFilter:
+    __slots__ = ("field", "checks")
+
+    def __init__(self, field: str, rules: Dict[str, Any]):
+        """
+        {"min": 10, "max": 40}: the number in the value ("£38.46", "Three") is in range
+        {"contains": "poem"} or {"contains": [...]}: any of the keywords, ignoring case
+        {"matches": "regex"}: the pattern is found in the value
+        Raises ValueError for a rule that can't be used.
+        """
+        self.field = field
+        if not isinstance(rules, dict) or not rules:
+            raise ValueError(f"expected an object with any of {', '.join(FILTER_OPS)}")
+        unknown = set(rules) - set(FILTER_OPS)
+        if unknown:
+            raise ValueError(f"unknown keys {sorted(unknown)} (allowed: {list(FILTER_OPS)})")
+
+        self.checks: List[Callable[[Any], bool]] = []
+        for op in ("min", "max"):
+            if op in rules:
+                bound = rules[op]
+                if isinstance(bound, bool) or not isinstance(bound, (int, float)):
+                    raise ValueError(f"{op}: expected a number")
+                self.checks.append(self._bound(op, float(bound)))
+
+        if "contains" in rules:
+            keywords = rules["contains"]
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            if not isinstance(keywords, list) or not keywords or \
+                    not all(isinstance(k, str) and k for k in keywords):
+                raise ValueError("contains: expected a keyword or a list of keywords")
+            lowered = [k.lower() for k in keywords]
+            self.checks.append(lambda value: any(k in _as_text(value).lower() for k in lowered))
+
+        if "matches" in rules:
+            if not isinstance(rules["matches"], str):
+                raise ValueError("matches: expected a regular expression string")
+            try:
+                pattern = re.compile(rules["matches"])
+            except re.error as e:
+                raise ValueError(f"matches: bad pattern {rules['matches']!r}: {e}") from None
+            self.checks.append(lambda value: pattern.search(_as_text(value)) is not None)
+
+    @staticmethod
+    def _bound(op: str, bound: float) -> Callable[[Any], bool]:
+        # A value with no number in it fails the range
+        if op == "min":
+            return lambda value: (n := as_number(value)) is not None and n >= bound
+        return lambda value: (n := as_number(value)) is not None and n <= bound
+
+    def test(self, item: Dict[str, Any]) -> bool:
+        value = item.get(self.field)
+        return all(check(value) for check in self.checks)
+
+
+class ListingFilters:
+    """
+    The filters section compiled: one FieldFilter per listing field, in
+    config order, and the field "unseen" keys items by (None when off).
+    """
+
+    def __init__(self, filters: Dict[str, Any], fields: Dict[str, Any]):
+        """
+        Raises ValueError naming the offending filter.
+        """
+        self.rules: List[FieldFilter] = []
+        self.unseen: Optional[str] = None
+        for name, rules in filters.items():
+            if name == "unseen":
+                key = "url" if rules is True else rules
+                if key is False:
+                    continue
+                if not isinstance(key, str):
+                    raise ValueError("unseen: expected true, false or the listing field items are keyed by")
+                self.unseen = self._listing_field(key, fields)
+                continue
+            self._listing_field(name, fields)
+            try:
+                self.rules.append(FieldFilter(name, rules))
+            except ValueError as e:
+                raise ValueError(f"{name}: {e}") from None
+
+    @staticmethod
+    def _listing_field(name: str, fields: Dict[str, Any]) -> str:
+        if name not in fields:
+            raise ValueError(
+                f"{name}: not a listing field (filters run before detail pages are fetched; "
+                f"fields: {', '.join(fields)})"
+            )
+        return name
+
+
+class ItemFilter:
+    def __init__(self):
+        self.filters: Optional[ListingFilters] = None
+        self.path: Optional[str] = None
+        self.checked = 0
+        self.skipped: Dict[str, int] = {}
+        # Keys of scraped items (persisted), and of items let through this run
+        self._seen: Set[str] = set()
+        self._passed: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.filters is not None
+
+    def configure(self, filters: Optional[ListingFilters], path: Optional[str] = None) -> None:
+        """
+        filters: the compiled filters section (None keeps every item)
+        path: JSON file the keys of items already seen persist in, for "unseen"
+        """
+        self.filters = filters
+        self.path = path
+        self.checked = 0
+        self.skipped = {}
+        self._seen = self._load() if filters is not None and filters.unseen else set()
+        self._passed = set()
+
+    def _load(self) -> Set[str]:
+        if not self.path:
+            return set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return set(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return set()
+
+    def save(self) -> None:
+        if not self.path or self.filters is None or not self.filters.unseen:
+            return
+        with self._lock:
+            keys = sorted(self._seen)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(keys, f, indent=0)
+
+    def apply(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        The listing items that pass every filter, in order. Each skipped item
+        counts against the first filter it failed. An item let through is not
+        seen yet (only remember() makes it so), but a repeat of it later in
+        the same run is skipped as unseen.
+        """
+        if self.filters is None:
+            return items
+
+        kept = []
+        for item in items:
+            self.checked += 1
+            failed = next((rule.field for rule in self.filters.rules if not rule.test(item)), None)
+            if failed is None and self.filters.unseen:
+                key = _as_text(item.get(self.filters.unseen))
+                if key in self._seen or key in self._passed:
+                    failed = "unseen"
+                elif key:
+                    self._passed.add(key)
+            if failed is None:
+                kept.append(item)
+            else:
+                self.skipped[failed] = self.skipped.get(failed, 0) + 1
+        return kept
+
+    def remember(self, items: List[Dict[str, Any]]) -> None:
+        """
+        Mark items as seen once their record is complete (detail page merged),
+        so a failed detail fetch is tried again on the next run.
+        """
+        if self.filters is None or not self.filters.unseen:
+            return
+        keys = [_as_text(item.get(self.filters.unseen)) for item in items]
+        with self._lock:
+            self._seen.update(key for key in keys if key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"checked": self.checked, "skipped": sum(self.skipped.values()), "by_filter": dict(self.skipped)}
+
+
+# Listing filters of the current site config, shared by both engines
+item_filter = ItemFilter()
@@ -0,0 +1,95 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# One path step: .name, ['name'], [3] or [*]
+_STEP_RE = re.compile(r"""\.?([^.\[\]]+)|\[(\d+|\*|'[^']*'|"[^"]*")\]""")
+
+WILDCARD = object()
+
+Path = Tuple[Any, ...]
+
+
+def compile_path(path: str) -> Path:
+    """
+    Parse a small JSONPath subset into steps:
+        $.data.items[*].author.name    quotes[0]    ['odd.key']
+    The leading "$" is optional. [*] maps the rest of the path over a list.
+    """
+    text = path.strip()
+    if text.startswith("$"):
+        text = text[1:]
+
+    steps: List[Any] = []
+    pos = 0
+    while pos < len(text):
+        match = _STEP_RE.match(text, pos)
+        if match is None:
+            raise ValueError(f"Bad JSON path {path!r} at {text[pos:]!r}")
+
+        name, bracket = match.groups()
+        if name is not None:
+            steps.append(WILDCARD if name == "*" else name)
+        elif bracket == "*":
+            steps.append(WILDCARD)
+        elif bracket.isdigit():
+            steps.append(int(bracket))
+        else:
+            steps.append(bracket[1:-1])
+        pos = match.end()
+
+    return tuple(steps)
+
+
+def resolve(data: Any, path: Path) -> Any:
+    """
+    Value at path, or None if any step is missing. A wildcard returns a list.
+    """
+    for i, step in enumerate(path):
+        if step is WILDCARD:
+            if isinstance(data, dict):
+                data = list(data.values())
+            if not isinstance(data, list):
+                return None
+            rest = path[i + 1:]
+            return [value for value in (resolve(item, rest) for item in data) if value is not None]
+
+        if isinstance(step, int):
+            if not isinstance(data, list) or step >= len(data):
+                return None
+            data = data[step]
+        else:
+            if not isinstance(data, dict) or step not in data:
+                return None
+            data = data[step]
+
+    return data
+
+
+class FieldMapper:
+    def __init__(self, fields: Dict[str, str], items: Optional[str] = None):
+        """
+        fields: output field -> JSON path, relative to each item
+        items: path to the list of items in a payload (the payload itself if omitted)
+        """
+        self.fields = {name: compile_path(path) for name, path in fields.items()}
+        self.items = compile_path(items) if items else ()
+
+    def records(self, payload: Any) -> List[Dict[str, Any]]:
+        """
+        One record per item of the payload; missing fields are "", like parse_items.
+        """
+        items = resolve(payload, self.items)
+        if items is None:
+            return []
+        if not isinstance(items, list):
+            items = [items]
+
+        records = []
+        for item in items:
+            record = {}
+            for name, path in self.fields.items():
+                value = resolve(item, path)
+                record[name] = "" if value is None else value
+            records.append(record)
+
+        return records
@@ -1,10 +1,27 @@
 import argparse
-import random
-import time
 import json
-from parsing import parse_items, find_next_page, parse_detail_page, parse_table_by_header
+import os
 from export import write_to_csv, write_to_json
 from smart_fetch import smart_fetch
+from fetch import session_pool
+from cache import response_cache, CACHE_MODES
+from concurrent.futures import ThreadPoolExecutor
+from details import detail_job, run_detail_job
+from retry_queue import RetryLater, RetryQueue
+from itertools import repeat
+from rate_limiter import rate_limiter
+from concurrency_controller import concurrency_controller
+from browser_pool import browser_pool
+from request_blocking import request_blocker
+from render_wait import render_waits
+from browser_extract import browser_extractor, parse_list_page
+from response_capture import response_capture
+from api_discovery import api_source, discover_api
+from render_memory import render_memory
+from parse_pool import parse_pool
+from item_filter import item_filter
+from site_config import ConfigError, load_config
+from async_engine import run_async_crawl
 
 BASE_URL = "https://books.toscrape.com/catalogue/"
 
@@ -58,80 +75,440 @@ def parse_cli_args():
         "--delay",
         type=float,
         default=1.5,
-        help="Base delay (seconds) between page requests",
+        help="Seconds between requests to one host when the config has no rate_limit",
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=["sync", "async"],
+        default="sync",
+        help="Crawl engine: sequential loop or asyncio scheduler (default: sync)",
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Async engine: max requests in flight overall (default: 8)",
+    )
+
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=2,
+        help="Starting per-host concurrency; adapts with AIMD from there (default: 2)",
+    )
+
+    parser.add_argument(
+        "--detail-workers",
+        type=int,
+        default=1,
+        help="Sync engine: threads fetching detail pages of a listing (default: 1)",
+    )
+
+    parser.add_argument(
+        "--browser-workers",
+        type=int,
+        default=1,
+        help="Long-lived Playwright browsers for JS rendering (default: 1)",
+    )
+
+    parser.add_argument(
+        "--render-pages",
+        type=int,
+        default=4,
+        help="Async engine: concurrent Playwright pages on one shared browser; 0 uses the browser pool (default: 4)",
+    )
+
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Processes parsing listings and detail pages off the fetch interpreter; 0 parses in-process (default: 0)",
+    )
+
+    parser.add_argument(
+        "--parse-batch",
+        type=int,
+        default=1,
+        help="Pages sent to a parse worker per round trip (default: 1)",
+    )
+
+    parser.add_argument(
+        "--parse-batch-wait-ms",
+        type=float,
+        default=20,
+        help="How long a partial parse batch waits for more pages (default: 20)",
+    )
+
+    parser.add_argument(
+        "--cache-mode",
+        choices=CACHE_MODES,
+        default="off",
+        help="HTTP response cache: off, read-write, or read-only replay (default: off)",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=".scrape_cache",
+        help="Directory for the response cache (default: .scrape_cache)",
+    )
+
+    parser.add_argument(
+        "--dead-letter",
+        type=str,
+        default=None,
+        help="JSONL file for URLs that exhausted their retries (default: <output>_dead_letter.jsonl)",
+    )
+
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=256,
+        help="Cache size cap in MB; least recently used pages are evicted (default: 256)",
+    )
+
+    parser.add_argument(
+        "--discover-api",
+        type=str,
+        default=None,
+        metavar="CONFIG_OUT",
+        help="Render --url once, detect its paginated JSON endpoint and write the config "
+             "with a generated \"api\" section to CONFIG_OUT, then exit",
     )
 
     return parser.parse_args()
 
-def main():
-    args = parse_cli_args()
 
+def scrape_details_parallel(pool: ThreadPoolExecutor, jobs: list[dict], detail_fields: dict,
+                            retries: RetryQueue) -> None:
+    """
+    Run detail jobs in the pool; each worker merges into its own item, so
+    listing order is preserved. Failures land on the retry queue.
+    """
+    list(pool.map(run_detail_job, jobs, repeat(detail_fields), repeat(retries)))
+
+
+def run_detail_retries(pool: ThreadPoolExecutor | None, jobs: list[dict], detail_fields: dict,
+                       retries: RetryQueue) -> None:
+    if pool:
+        scrape_details_parallel(pool, jobs, detail_fields, retries)
+    else:
+        for job in jobs:
+            run_detail_job(job, detail_fields, retries)
+
+
+def fetch_list_page(url: str, retries: RetryQueue, pool: ThreadPoolExecutor | None,
+                    detail_fields: dict | None) -> str | None:
+    """
+    Fetch a listing page. While it waits for a deferred retry, detail retries
+    that come due are processed instead of sleeping. Returns None once the
+    page is dead-lettered.
+    """
+    job = {"url": url, "kind": "list"}
+
+    while True:
+        try:
+            html = smart_fetch(url, job["kind"])
+        except RetryLater as e:
+            if not retries.defer(job, e):
+                return None
+        else:
+            if html is None:
+                retries.dead_letter(job, "fetch failed")
+            return html
+
+        while True:
+            ready = retries.wait_ready()
+            others = [j for j in ready if j is not job]
+            if others:
+                run_detail_retries(pool, others, detail_fields, retries)
+            if len(others) < len(ready):
+                break
+
+
+def crawl_sync(args, start_url: str, config: dict, base_url: str, retries: RetryQueue) -> list[dict]:
+    """
+    Sequential crawl: list page, then each detail page, then paginate.
+    Failed fetches are retried from the queue as they come due.
+    """
     records: list[dict] = []
     page_counter = 0
-    next_url = args.url
+    next_url = start_url
 
-    with open(args.config, "r", encoding="utf-8") as f:
-        config = json.load(f)
-    
-    BASE_URL = args.base_url
+    detail_fields = config.get("detail_fields")
+
+    detail_pool = None
+    if args.detail_workers > 1:
+        detail_pool = ThreadPoolExecutor(max_workers=args.detail_workers)
 
     while next_url:
         print(f"Scraping: {next_url}")
 
-        html = smart_fetch(next_url)
+        html = fetch_list_page(next_url, retries, detail_pool, detail_fields)
         if html is None:
-            print("Failed to retrieve page; stopping.")
+            print("Failed to retrieve page (dead-lettered); stopping.")
             break
 
         # --- LIST PAGE PARSING ---
-        items = parse_items(html, config, BASE_URL)
+        items, page_next = parse_list_page(next_url, html, config, base_url)
         print(f"  Found {len(items)} items")
 
         if not items:
             print("No items found; site structure may differ.")
             break
 
-        # --- DETAIL PAGE PARSING (OPTIONAL, CONFIG-DRIVEN) ---
-        detail_fields = config.get("detail_fields")
+        # --- FILTERS: items the listing already rules out never cost a detail fetch ---
+        if item_filter.enabled:
+            kept = item_filter.apply(items)
+            print(f"  Kept {len(kept)} of {len(items)} items after filters")
+            items = kept
 
-        for item in items:
-            # If this site has no detail fields, skip detail scraping entirely
-            if not detail_fields:
-                break
-
-            detail_url = item.get("url")
-            if not detail_url:
-                continue
-
-            detail_html = smart_fetch(detail_url)
-            if detail_html is None:
-                print(f"[WARN] Failed to fetch detail page: {detail_url}")
-                continue
-
-            detail_data = parse_detail_page(detail_html, detail_fields)
-            table_data = parse_table_by_header(detail_html)
+        # --- DETAIL PAGE PARSING (OPTIONAL, CONFIG-DRIVEN) ---
+        if detail_fields:
+            jobs = [detail_job(item) for item in items if item.get("url")]
 
-            item.update(table_data)
-            item.update(detail_data)
+            if detail_pool:
+                scrape_details_parallel(detail_pool, jobs, detail_fields, retries)
+            else:
+                for job in jobs:
+                    run_detail_job(job, detail_fields, retries)
+                    # Deferred retries that came due ride along with the listing
+                    run_detail_retries(None, retries.pop_ready(), detail_fields, retries)
 
-            # Polite delay between detail-page requests
-            time.sleep(random.uniform(0.5, 1.2))
+            run_detail_retries(detail_pool, retries.pop_ready(), detail_fields, retries)
+        else:
+            item_filter.remember(items)
 
         records.extend(items)
 
         # --- PAGINATION ---
-        next_url = find_next_page(html, config, BASE_URL)
-
-        jitter = random.uniform(0.5, 1.5)
-        time.sleep(args.delay * jitter)
+        next_url = page_next
 
         page_counter += 1
         if page_counter >= args.max_pages:
             print("Reached max_pages; stopping.")
             break
 
+    # Drain whatever is still waiting on the retry queue
+    while len(retries):
+        run_detail_retries(detail_pool, retries.wait_ready(), detail_fields, retries)
+
+    if detail_pool:
+        detail_pool.shutdown()
+
+    return records
+
+
+def main():
+    args = parse_cli_args()
+
+    # Validated and precompiled up front: a bad selector stops the run before any fetch
+    try:
+        config = load_config(args.config)
+    except ConfigError as e:
+        raise SystemExit(f"[config] {e}") from e
+
+    if config.stream is None and config.get("parse_engine", "auto") == "auto":
+        print(f"[parse] Listings are parsed from a tree: {config.stream_reason}")
+
+    BASE_URL = args.base_url
+
+    # Politeness: per-host token buckets shared by every fetch path
+    limits = config.get("rate_limit", {})
+    rate_limiter.configure(
+        rate=limits.get("requests_per_second", 1.0 / args.delay if args.delay > 0 else 1000.0),
+        burst=limits.get("burst", 1),
+        hosts=limits.get("hosts", {}),
+    )
+
+    # Per-host concurrency: additive increase while healthy, halve on 429/503 or slow responses
+    adaptive = config.get("concurrency", {})
+    concurrency_controller.configure(
+        initial=adaptive.get("initial", args.per_host),
+        min_limit=adaptive.get("min"),
+        max_limit=adaptive.get("max", max(args.concurrency, args.detail_workers)),
+        latency_factor=adaptive.get("latency_factor"),
+    )
+
+    browser_config = config.get("browser", {})
+    browser_pool.configure(
+        workers=args.browser_workers,
+        max_navigations=browser_config.get("max_navigations"),
+        max_memory_mb=browser_config.get("max_memory_mb"),
+        contexts_per_browser=browser_config.get("contexts_per_browser"),
+    )
+
+    # Assets we never parse (images, fonts, media, trackers) are aborted in the browser
+    request_blocker.configure(config.get("render", {}).get("block"))
+
+    # Parsing scales across cores: workers compile the config once and take page bytes
+    parse_pool.configure(
+        config, BASE_URL,
+        workers=args.parse_workers,
+        batch_size=args.parse_batch,
+        batch_wait_ms=args.parse_batch_wait_ms,
+    )
+
+    # Rendered pages wait for their content (item_selector on listings) instead of networkidle
+    render_waits.configure(config)
+
+    # Rendered listings can be extracted in the page instead of shipping the DOM back
+    browser_extractor.configure(config, BASE_URL)
+
+    # ... or mapped from the JSON responses the page itself fetches
+    response_capture.configure(config, BASE_URL)
+
+    retry_config = config.get("retry", {})
+    retries = RetryQueue(
+        dead_letter_path=args.dead_letter or f"{args.output}_dead_letter.jsonl",
+        max_attempts=retry_config.get("max_attempts", 4),
+        host_budget=retry_config.get("host_budget", 100),
+        base_delay=retry_config.get("base_delay", 1.0),
+        max_delay=retry_config.get("max_delay", 60.0),
+    )
+
+    cache_config = config.get("cache", {})
+    response_cache.configure(
+        mode=args.cache_mode,
+        path=os.path.join(args.cache_dir, "responses.sqlite"),
+        ttl=cache_config.get("ttl"),
+        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+    )
+
+    # --- API DISCOVERY: one render, then write the config and stop ---
+    if args.discover_api:
+        section = discover_api(args.url)
+        browser_pool.close_all()
+        if section is None:
+            print("[api] No paginated JSON endpoint found; config not written.")
+            return
+
+        with open(args.discover_api, "w", encoding="utf-8") as f:
+            json.dump({**config, "api": section}, f, indent=2)
+        print(f"[api] Endpoint {section['url']} written to {args.discover_api}; "
+              f"review its \"fields\" and crawl with --config {args.discover_api}")
+        return
+
+    # Render-first decisions learned per host, kept next to the cache across runs
+    render_config = config.get("render", {})
+    render_memory.configure(
+        path=os.path.join(args.cache_dir, "render_decisions.json"),
+        mode=render_config.get("mode"),
+        threshold=render_config.get("learn_after"),
+        reprobe_every=render_config.get("reprobe_every"),
+    )
+
+    # Listing-level filters; "unseen" remembers item keys next to the cache across runs
+    item_filter.configure(config.filters, path=os.path.join(args.cache_dir, "seen_items.json"))
+
+    # Listings come straight from the JSON endpoint when the config has one
+    api_source.configure(config)
+    start_url = args.url
+    if api_source.enabled:
+        start_url = api_source.start_url
+        print(f"[api] Crawling JSON endpoint {start_url}")
+
+    if args.engine == "async":
+        records = run_async_crawl(
+            start_url,
+            config,
+            BASE_URL,
+            args.max_pages,
+            retries,
+            concurrency=args.concurrency,
+            render_pages=args.render_pages,
+        )
+    else:
+        records = crawl_sync(args, start_url, config, BASE_URL, retries)
+
     print(f"Total items collected: {len(records)}")
 
+    if retries.dead_lettered:
+        print(f"[retry] {retries.dead_lettered} URLs dead-lettered to {retries.dead_letter_path}")
+
+    for host, stats in session_pool.stats().items():
+        print(
+            f"[pool] {host}: {stats['requests']} requests over "
+            f"{stats['connections']} connections ({stats['reused']} reused)"
+        )
+    session_pool.close_all()
+
+    browser_stats = browser_pool.stats()
+    if browser_stats["launches"]:
+        print(
+            f"[browser] {browser_stats['launches']} browser launches, "
+            f"{browser_stats['recycles']} context recycles"
+        )
+
+    blocking = request_blocker.stats()
+    if blocking["allowed"] or blocking["blocked"]:
+        print(
+            f"[browser] {blocking['blocked']} requests blocked {blocking['blocked_by_reason']}, "
+            f"{blocking['allowed']} allowed"
+        )
+
+    filtering = item_filter.stats()
+    if filtering["skipped"]:
+        reasons = ", ".join(f"{name}: {count}" for name, count in filtering["by_filter"].items())
+        print(
+            f"[filter] {filtering['skipped']} of {filtering['checked']} listed items skipped "
+            f"before their detail fetch ({reasons})"
+        )
+    # A replay crawls nothing new, so it must not mark anything as seen
+    if not response_cache.replay:
+        item_filter.save()
+
+    parsing = parse_pool.stats()
+    if parsing["parsed"]:
+        print(
+            f"[parse] {parsing['parsed']} pages parsed in {parsing['workers']} worker processes, "
+            f"{parsing['batches']} batches"
+        )
+    parse_pool.close()
+
+    extraction = browser_extractor.stats()
+    if extraction["extracted"] or extraction["fallbacks"]:
+        print(
+            f"[extract] {extraction['extracted']} listings extracted in-browser, "
+            f"{extraction['fallbacks']} fell back to HTML parsing"
+        )
+
+    remembered = render_memory.stats()
+    if remembered["skipped"] or remembered["render_first"]:
+        print(
+            f"[render] {remembered['skipped']} static fetches skipped; "
+            f"render-first: {', '.join(remembered['render_first']) or 'none'}"
+        )
+    # A replay's misses look like failed static fetches, not something learned
+    if not response_cache.replay:
+        render_memory.save()
+
+    capture = response_capture.stats()
+    if capture["captured"] or capture["misses"]:
+        print(
+            f"[capture] {capture['captured']} listings mapped from JSON responses, "
+            f"{capture['misses']} without a matching response"
+        )
+
+    browser_pool.close_all()
+
+    for host, stats in concurrency_controller.stats().items():
+        print(
+            f"[aimd] {host}: limit {stats['limit']}, {stats['successes']} ok, "
+            f"{stats['rate_limited']} rate-limited, p50 {stats['p50']}s, p90 {stats['p90']}s"
+        )
+
+    if response_cache.enabled:
+        stats = response_cache.stats()
+        print(
+            f"[cache] {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['revalidated']} revalidated (304), {stats['parse_reused']} parses reused, "
+            f"{stats['bytes']} bytes stored"
+        )
+        response_cache.close()
+
     if args.format in ("csv", "both"):
         write_to_csv(records, f"{args.output}.csv")
 
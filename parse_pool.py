@@ -0,0 +1,182 @@
+import json
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from document import Document
+from parsing import parse_detail_record, parse_listing
+from site_config import SiteConfig
+
+# (kind, url, utf-8 body): "list" -> {"items", "next"}, "detail" -> record
+Task = Tuple[str, str, bytes]
+
+# Per worker process, set once by the initializer
+_site: Optional[SiteConfig] = None
+_base_url = ""
+
+
+def run_task(site: SiteConfig, base_url: str, task: Task) -> Dict[str, Any]:
+    kind, url, raw = task
+    # Document.raw is the text encoded as utf-8, so this is the page the parent saw
+    doc = Document(raw.decode("utf-8"), url, raw)
+    if kind == "list":
+        items, next_url = parse_listing(doc, site, base_url)
+        return {"items": items, "next": next_url}
+    return parse_detail_record(doc, site["detail_fields"])
+
+
+def _init_worker(config: Dict[str, Any], base_url: str) -> None:
+    global _site, _base_url
+    _site = SiteConfig(config)
+    _base_url = base_url
+
+
+def _run_batch(tasks: List[Task]) -> List[Tuple[bool, Any]]:
+    """
+    One round trip: every task of the batch, each with its own success or error.
+    """
+    results = []
+    for task in tasks:
+        try:
+            results.append((True, run_task(_site, _base_url, task)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+class ParsePool:
+    def __init__(self):
+        self.workers = 0
+        self.batch_size = 1
+        self.batch_wait = 0.02
+        self.parsed = 0
+        self.batches = 0
+        self._site: Optional[SiteConfig] = None
+        self._base_url = ""
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Tuple[Task, Future]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def configure(self, config: SiteConfig, base_url: str, workers: int = 0,
+                  batch_size: int = 1, batch_wait_ms: float = 20) -> None:
+        """
+        workers: parse processes (0 parses in the calling thread, as before)
+        batch_size: pages sent to a worker per round trip
+        batch_wait_ms: how long a partial batch waits for more pages
+        """
+        self.close()
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.parsed = self.batches = 0
+        self._site = config
+        self._base_url = base_url
+        if workers <= 0:
+            return
+
+        # Compiled rules hold closures and can't be pickled; each worker
+        # compiles the plain JSON once in its initializer instead
+        plain = json.loads(json.dumps(config))
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # Workers start clean rather than forking a process full of threads
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(plain, base_url),
+        )
+
+    def parse(self, kind: str, url: str, doc: Document) -> Dict[str, Any]:
+        """
+        Parse a page in a worker process; blocks the calling thread (not the
+        GIL) until its batch comes back. A dead pool falls back to in-process.
+        """
+        task = (kind, url, doc.raw)
+        try:
+            return self.submit(task).result()
+        except BrokenProcessPool as e:
+            if self._executor is not None:
+                print(f"[parse] Worker pool failed ({e}); parsing in-process")
+                self._executor = None
+            return run_task(self._site, self._base_url, task)
+
+    def submit(self, task: Task) -> Future:
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((task, future))
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.batch_wait, self._flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+        if batch:
+            self._send(batch)
+        return future
+
+    def _take(self) -> List[Tuple[Task, Future]]:
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch: List[Tuple[Task, Future]]) -> None:
+        executor = self._executor
+        if executor is None:
+            for _, future in batch:
+                future.set_exception(BrokenProcessPool("parse pool is closed"))
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.parsed += len(batch)
+        try:
+            done = executor.submit(_run_batch, [task for task, _ in batch])
+        except (BrokenProcessPool, RuntimeError) as e:
+            for _, future in batch:
+                future.set_exception(BrokenProcessPool(str(e)))
+            return
+        done.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[Task, Future]], done: Future) -> None:
+        error = done.exception()
+        if error is not None:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+
+        for (_, future), (ok, value) in zip(batch, done.result()):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stats(self) -> Dict[str, int]:
+        return {"workers": self.workers, "parsed": self.parsed, "batches": self.batches}
+
+    def close(self) -> None:
+        self._flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+# Parse workers for listings and detail pages of the current site config
+parse_pool = ParsePool()
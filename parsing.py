@@ -1,99 +1,123 @@
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+from document import Page, as_document
+from site_config import DEFAULT_TABLE_RULE, TableRule, compile_config, compile_fields
 
 
-def parse_items(html: str, config: Dict[str, Any], base_url: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_listing(html: Page, config: Dict[str, Any], base_url: str) -> Tuple[List[Dict[str, Any]], str | None]:
+    """
+    Items and next-page URL of a listing. Streamed straight off the tokenizer
+    when every list selector allows it, otherwise read from one shared tree.
+    """
+    site = compile_config(config)
+    doc = as_document(html)
+    if site.stream is None or doc.parsed:
+        return parse_items(doc, site, base_url), find_next_page(doc, site, base_url)
+
+    items, href = site.stream.parse(doc.text, base_url)
+    return items, urljoin(base_url, href) if href is not None else None
+
+
+def parse_items(html: Page, config: Dict[str, Any], base_url: str) -> List[Dict[str, Any]]:
+    site = compile_config(config)
+    doc = as_document(html)
+    if site.stream is not None and not doc.parsed:
+        return site.stream.parse(doc.text, base_url)[0]
+
+    soup = doc.scoped_soup(site.parse_only)
     items = []
 
-    for block in soup.select(config["item_selector"]):
+    for block in site.item_selector.select(soup):
         record = {}
 
-        for field, rules in config["fields"].items():
-            el = block.select_one(rules["selector"])
-            if not el:
-                record[field] = ""
-                continue
-
-            # Attribute extraction
-            if "attr" in rules:
-                value = el.get(rules["attr"], "").strip()
-            # Text extraction
-            elif rules.get("text"):
-                value = el.get_text(strip=True)
-            # Class-based extraction
-            elif "class_exclude" in rules:
-                classes = el.get("class", [])
-                value = next((c for c in classes if c not in rules["class_exclude"]), "")
-            else:
-                value = el.get_text(strip=True)
-
-            if rules.get("absolute"):
-                value = urljoin(base_url, value)
-
-            record[field] = value
+        # Attribute / text / class-based extraction, chosen when the config was compiled
+        for rule in site["fields"].rules:
+            el = rule.selector.select_one(block)
+            record[rule.name] = rule.extract(el, base_url) if el else ""
 
         items.append(record)
 
     return items
 
 
-def find_next_page(html: str, config: Dict[str, Any], base_url: str) -> str | None:
-    soup = BeautifulSoup(html, "html.parser")
-    rules = config.get("pagination")
-
-    if not rules:
+def find_next_page(html: Page, config: Dict[str, Any], base_url: str) -> str | None:
+    site = compile_config(config)
+    if site.pagination is None:
         return None
 
-    el = soup.select_one(rules["selector"])
+    doc = as_document(html)
+    if site.stream is not None and not doc.parsed:
+        href = site.stream.parse(doc.text, base_url)[1]
+        return urljoin(base_url, href) if href is not None else None
+
+    el = site.pagination.select_one(doc.scoped_soup(site.parse_only))
     if not el:
         return None
 
-    href = el.get(rules.get("attr", "href"), "").strip()
+    href = el.get(site.pagination_attr, "").strip()
     return urljoin(base_url, href)
 
-def parse_detail_page(html: str, detail_fields: Dict[str, Any]) -> Dict[str, Any]:
+def parse_detail_page(html: Page, detail_fields: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Parse a detail page using selector rules.
+    Parse a detail page using its field rules. jsonld / script_json fields
+    come from the page's script blocks alone; selector and microdata fields
+    are streamed when every selector allows it, else read from the tree.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    record = {}
-
-    for field, rules in detail_fields.items():
-        el = soup.select_one(rules["selector"])
-        if not el:
-            record[field] = ""
-            continue
+    fields = compile_fields(detail_fields)
+    doc = as_document(html)
+    record = {name: "" for name in fields}
 
-        if "attr" in rules:
-            value = el.get(rules["attr"], "").strip()
-        elif rules.get("text"):
-            value = el.get_text(strip=True)
-        else:
-            value = el.get_text(strip=True)
+    for rule in fields.structured:
+        record[rule.name] = rule.value(doc.structured)
 
-        record[field] = value
+    if fields.rules and fields.stream is not None and not doc.parsed:
+        record.update(fields.stream.parse(doc.text, "")[0][0])
+    elif fields.rules:
+        soup = doc.soup
+        for rule in fields.rules:
+            el = rule.selector.select_one(soup)
+            record[rule.name] = rule.extract(el, "") if el else ""
 
     return record
 
-def parse_table_by_header(html: str) -> dict:
+def parse_detail_record(html: Page, detail_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Table rows come first so that explicit detail_fields win on key clashes,
+    matching the original merge order. Both read the same parsed tree.
     """
-    Parse key-value tables where <th> is the field name and <td> is the value.
+    fields = compile_fields(detail_fields)
+    doc = as_document(html)
+    data = parse_table_by_header(doc, fields.table) if fields.table is not None else {}
+    data.update(parse_detail_page(doc, fields))
+    return data
+
+
+def parse_table_by_header(html: Page, table: TableRule = DEFAULT_TABLE_RULE) -> dict:
     """
-    soup = BeautifulSoup(html, "html.parser")
+    Parse key-value tables where the key cell (<th>) is the field name and
+    the value cell (<td>) is the value, laid out as detail_table configures.
+    """
+    doc = as_document(html)
+    # No table markup means no rows; don't build a tree to find that out
+    if not doc.parsed and table.marker is not None and not table.marker.search(doc.text):
+        return {}
+
     data = {}
 
-    for row in soup.select("table.table-striped tr"):
-        th = row.find("th")
-        td = row.find("td")
+    for row in table.rows.select(doc.soup):
+        th = table.key(row)
+        if not th:
+            continue
 
-        if not th or not td:
+        # Rows dropped by detail_table.keys never have their value read
+        key = table.output_key(th.get_text(strip=True))
+        if key is None:
             continue
 
-        key = th.get_text(strip=True).lower().replace(" ", "_")
-        value = td.get_text(strip=True)
+        td = table.value(row)
+        if not td:
+            continue
 
-        data[key] = value
+        data[key] = td.get_text(strip=True)
 
     return data
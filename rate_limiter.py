@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        rate: tokens (requests) added per second
+        burst: max tokens that can accumulate while the host is idle
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Take one token and return how long the caller must wait before using it.
+        Tokens may go negative, which queues callers in reservation order.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Push back the next grant by at least `seconds` (e.g. after a 429).
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class RateLimiter:
+    def __init__(self, rate: float = 1.0, burst: int = 1):
+        """
+        rate / burst: defaults for hosts without an explicit override
+        """
+        self.rate = rate
+        self.burst = burst
+        self._overrides: Dict[str, Dict[str, Any]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rate: Optional[float] = None, burst: Optional[int] = None,
+                  hosts: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        with self._lock:
+            if rate is not None:
+                self.rate = rate
+            if burst is not None:
+                self.burst = burst
+            if hosts is not None:
+                self._overrides = {h.lower(): v for h, v in hosts.items()}
+            self._buckets.clear()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc.lower()
+
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                override = self._overrides.get(host, {})
+                bucket = TokenBucket(
+                    override.get("requests_per_second", self.rate),
+                    override.get("burst", self.burst),
+                )
+                self._buckets[host] = bucket
+
+        return bucket
+
+    def acquire(self, url: str) -> None:
+        """
+        Block the calling thread until this host's bucket grants a request.
+        """
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str) -> None:
+        """
+        Asyncio variant of acquire: waits without blocking the event loop.
+        """
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, url: str, seconds: float) -> None:
+        self.bucket(url).penalize(seconds)
+
+
+# Shared by every fetch path so threads and the async engine draw from the same buckets
+rate_limiter = RateLimiter()
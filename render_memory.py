@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+RENDER_MODES = ("auto", "always", "never")
+
+
+class RenderMemory:
+    def __init__(self, path: Optional[str] = None, mode: str = "auto",
+                 threshold: int = 3, reprobe_every: int = 25):
+        """
+        path: JSON file the learned decisions persist in (None keeps them in memory)
+        mode: auto (learn per host), always (skip static fetches), never (no browser)
+        threshold: consecutive pages needing a render before static fetches are skipped
+        reprobe_every: skipped pages between static probes, in case the site changed
+        """
+        self.path = path
+        self.mode = mode
+        self.threshold = threshold
+        self.reprobe_every = reprobe_every
+        self.skipped = 0
+        self._decisions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, path: Optional[str] = None, mode: Optional[str] = None,
+                  threshold: Optional[int] = None, reprobe_every: Optional[int] = None) -> None:
+        if mode is not None:
+            if mode not in RENDER_MODES:
+                raise ValueError(f"render.mode must be one of {RENDER_MODES}, got {mode!r}")
+            self.mode = mode
+        if threshold is not None:
+            self.threshold = threshold
+        if reprobe_every is not None:
+            self.reprobe_every = reprobe_every
+        if path is not None:
+            self.path = path
+            self._decisions = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            blob = {key: {"render": d["render"], "streak": d["streak"]} for key, d in self._decisions.items()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(blob, f, indent=2, sort_keys=True)
+
+    @staticmethod
+    def key(url: str, kind: Optional[str]) -> str:
+        # Listings and detail pages of one host often differ, so they learn separately
+        return f"{urlsplit(url).netloc.lower()} {kind or 'page'}"
+
+    @property
+    def may_render(self) -> bool:
+        return self.mode != "never"
+
+    def skip_static(self, url: str, kind: Optional[str]) -> bool:
+        """
+        True when this page should go straight to the browser. A host that
+        learned to render still gets a static probe every reprobe_every pages.
+        """
+        if self.mode != "auto":
+            return self.mode == "always"
+
+        with self._lock:
+            decision = self._decisions.get(self.key(url, kind))
+            if decision is None or not decision["render"]:
+                return False
+
+            decision["since_probe"] = decision.get("since_probe", 0) + 1
+            if decision["since_probe"] > self.reprobe_every:
+                decision["since_probe"] = 0
+                return False
+
+            self.skipped += 1
+            return True
+
+    def record(self, url: str, kind: Optional[str], needs_render: bool) -> None:
+        """
+        Learn from a static fetch: threshold renders in a row switch the host
+        to render-first; one usable static page switches it back.
+        """
+        if self.mode != "auto":
+            return
+
+        key = self.key(url, kind)
+        with self._lock:
+            decision = self._decisions.setdefault(key, {"render": False, "streak": 0})
+            if needs_render:
+                decision["streak"] += 1
+                if not decision["render"] and decision["streak"] >= self.threshold:
+                    decision["render"] = True
+                    decision["since_probe"] = 0
+                    print(f"[render] {key}: {decision['streak']} pages in a row needed a browser; rendering directly")
+            else:
+                if decision["render"]:
+                    print(f"[render] {key}: static page usable again; back to static-first")
+                decision["render"] = False
+                decision["streak"] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "skipped": self.skipped,
+                "render_first": sorted(key for key, d in self._decisions.items() if d["render"]),
+            }
+
+
+# Render-or-not decisions per host, shared by both engines
+render_memory = RenderMemory()
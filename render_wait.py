@@ -0,0 +1,141 @@
+from typing import Any, Dict, Optional
+
+WAIT_STRATEGIES = ("networkidle", "selector", "dom_stable")
+
+# Resolves once `quiet` ms pass without a DOM mutation (or after `limit` ms)
+DOM_STABLE_SCRIPT = """
+([quiet, limit]) => new Promise(resolve => {
+    let timer = null;
+    const done = () => { observer.disconnect(); resolve(true); };
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quiet);
+    });
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, attributes: true, characterData: true,
+    });
+    timer = setTimeout(done, quiet);
+    setTimeout(done, limit);
+})
+"""
+
+SELECTOR_COUNT_SCRIPT = "([sel, n]) => document.querySelectorAll(sel).length >= n"
+
+
+class WaitStrategy:
+    def __init__(
+        self,
+        strategy: str = "networkidle",
+        selector: Optional[str] = None,
+        min_count: int = 1,
+        quiet_ms: int = 500,
+        timeout_ms: int = 12000,
+        wait_until: Optional[str] = None,
+    ):
+        """
+        strategy: networkidle (legacy), selector (until `selector` matches
+                  min_count elements) or dom_stable (until the DOM is quiet for quiet_ms)
+        wait_until: goto's load state; defaults to domcontentloaded unless networkidle
+        """
+        if strategy not in WAIT_STRATEGIES:
+            raise ValueError(f"Unknown wait strategy: {strategy}")
+        if strategy == "selector" and not selector:
+            raise ValueError("Wait strategy 'selector' needs a selector")
+
+        self.strategy = strategy
+        self.selector = selector
+        self.min_count = min_count
+        self.quiet_ms = quiet_ms
+        self.timeout_ms = timeout_ms
+        self.wait_until = wait_until or ("networkidle" if strategy == "networkidle" else "domcontentloaded")
+
+    @classmethod
+    def from_config(cls, settings: Any, default_selector: Optional[str] = None) -> "WaitStrategy":
+        """
+        Build from a render.wait config value: a strategy name or a dict of
+        WaitStrategy arguments. With no settings, wait for default_selector
+        when there is one, else for a quiet DOM.
+        """
+        if isinstance(settings, str):
+            settings = {"strategy": settings}
+        settings = dict(settings or {})
+
+        if "strategy" not in settings:
+            if settings.get("selector") or default_selector:
+                settings["strategy"] = "selector"
+            else:
+                settings["strategy"] = "dom_stable"
+
+        if settings["strategy"] == "selector":
+            settings.setdefault("selector", default_selector)
+
+        return cls(**settings)
+
+    def describe(self) -> str:
+        if self.strategy == "selector":
+            return f"{self.min_count}x '{self.selector}'"
+        if self.strategy == "dom_stable":
+            return f"DOM quiet for {self.quiet_ms}ms"
+        return "network idle"
+
+    def _args(self):
+        if self.strategy == "selector":
+            return SELECTOR_COUNT_SCRIPT, [self.selector, self.min_count]
+        return DOM_STABLE_SCRIPT, [self.quiet_ms, self.timeout_ms]
+
+    def wait(self, page) -> None:
+        """
+        Block until the content is there (playwright.sync_api page).
+        """
+        if self.strategy == "networkidle":
+            return
+
+        script, arg = self._args()
+        try:
+            if self.strategy == "selector":
+                page.wait_for_function(script, arg=arg, timeout=self.timeout_ms)
+            else:
+                page.evaluate(script, arg)
+        except Exception:
+            print(f"[Playwright] Waited for {self.describe()} in vain; continuing anyway.")
+
+    async def wait_async(self, page) -> None:
+        """
+        Same as wait, for playwright.async_api pages.
+        """
+        if self.strategy == "networkidle":
+            return
+
+        script, arg = self._args()
+        try:
+            if self.strategy == "selector":
+                await page.wait_for_function(script, arg=arg, timeout=self.timeout_ms)
+            else:
+                await page.evaluate(script, arg)
+        except Exception:
+            print(f"[Playwright] Waited for {self.describe()} in vain; continuing anyway.")
+
+
+class RenderWaits:
+    def __init__(self):
+        # Until a site config is loaded, keep the original networkidle behavior
+        self._by_kind: Dict[str, WaitStrategy] = {}
+        self._fallback = WaitStrategy()
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        """
+        List pages wait for render.wait (default: item_selector present);
+        detail pages wait for render.detail_wait (default: quiet DOM).
+        """
+        render = config.get("render", {})
+        self._by_kind = {
+            "list": WaitStrategy.from_config(render.get("wait"), config.get("item_selector")),
+            "detail": WaitStrategy.from_config(render.get("detail_wait")),
+        }
+
+    def get(self, kind: Optional[str]) -> WaitStrategy:
+        return self._by_kind.get(kind, self._fallback)
+
+
+# Per page-kind wait strategies for the current site config
+render_waits = RenderWaits()
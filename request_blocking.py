@@ -0,0 +1,110 @@
+import threading
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+# Playwright resource types we never parse
+DEFAULT_BLOCK_TYPES = ("image", "font", "media")
+
+# Analytics / tracking hosts (subdomains match too)
+DEFAULT_BLOCK_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "newrelic.com",
+    "nr-data.net",
+)
+
+
+class RequestBlocker:
+    def __init__(self, resource_types: Iterable[str] = DEFAULT_BLOCK_TYPES,
+                 domains: Iterable[str] = DEFAULT_BLOCK_DOMAINS, enabled: bool = True):
+        """
+        resource_types: Playwright resource types to abort (image, font, media, stylesheet, ...)
+        domains: hosts whose requests are aborted, including their subdomains
+        enabled: False lets every request through (interception is not installed)
+        """
+        self.resource_types = set(resource_types)
+        self.domains = tuple(d.lower().lstrip(".") for d in domains)
+        self.enabled = enabled
+        self.allowed = 0
+        self.blocked: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, settings: Optional[Any]) -> None:
+        """
+        Apply a site config's render.block section: false disables blocking,
+        a dict may set resource_types and/or domains (defaults otherwise).
+        """
+        if settings is None:
+            return
+        if settings is False:
+            self.enabled = False
+            return
+
+        self.enabled = True
+        if isinstance(settings, dict):
+            self.resource_types = set(settings.get("resource_types", DEFAULT_BLOCK_TYPES))
+            self.domains = tuple(
+                d.lower().lstrip(".") for d in settings.get("domains", DEFAULT_BLOCK_DOMAINS)
+            )
+
+    def _blocked_domain(self, url: str) -> bool:
+        host = (urlsplit(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.resource_types:
+            reason = resource_type
+        elif self._blocked_domain(url):
+            reason = "domain"
+        else:
+            reason = None
+
+        with self._lock:
+            if reason is None:
+                self.allowed += 1
+            else:
+                self.blocked[reason] = self.blocked.get(reason, 0) + 1
+
+        return reason is not None
+
+    def handle(self, route) -> None:
+        """
+        Route handler for playwright.sync_api contexts.
+        """
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            route.abort()
+        else:
+            route.continue_()
+
+    async def handle_async(self, route) -> None:
+        """
+        Route handler for playwright.async_api contexts.
+        """
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "blocked": sum(self.blocked.values()),
+                "blocked_by_reason": dict(self.blocked),
+            }
+
+
+# Installed on every Playwright context (sync pool and async renderer)
+request_blocker = RequestBlocker()
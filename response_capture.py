@@ -0,0 +1,200 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+from browser_extract import PageExtract
+from render_wait import WaitStrategy
+from cache import response_cache, parse_scope
+from json_path import FieldMapper, compile_path, resolve
+
+# href of the pagination element, for captures whose payload has no next link
+NEXT_LINK_SCRIPT = """
+([selector, attr]) => {
+    const el = document.querySelector(selector);
+    return el ? (el.getAttribute(attr) ?? "") : null;
+}
+"""
+
+
+class Recorder:
+    """
+    page "response" listener collecting the responses a capture matches.
+    """
+
+    def __init__(self, capture: "ResponseCapture", page):
+        self.capture = capture
+        self.page = page
+        self.responses: List[Any] = []
+        page.on("response", self)
+
+    def __call__(self, response) -> None:
+        if self.capture.matches(response):
+            self.responses.append(response)
+
+    def detach(self) -> None:
+        if self.page is not None:
+            self.page.remove_listener("response", self)
+            self.page = None
+
+
+class ResponseCapture:
+    def __init__(self):
+        self.pattern: Optional[re.Pattern] = None
+        self.mapper: Optional[FieldMapper] = None
+        self.next_path = None
+        self.pagination: Optional[Dict[str, Any]] = None
+        self.timeout_ms = 10000
+        self.base_url = ""
+        self.captured = 0
+        self.misses = 0
+        self._cache_kind = ""
+
+    @property
+    def enabled(self) -> bool:
+        return self.pattern is not None
+
+    def configure(self, config: Dict[str, Any], base_url: str) -> None:
+        """
+        render.capture maps JSON responses of rendered listings to records:
+            {"url_pattern": "/api/quotes", "items": "data[*]",
+             "fields": {"quote": "text", "author": "author.name"},
+             "next": "links.next", "timeout_ms": 10000}
+        Without "next", the next page comes from the config's pagination selector.
+        """
+        self.pattern = None
+        settings = config.get("render", {}).get("capture")
+        if not settings:
+            return
+
+        self.pattern = re.compile(settings["url_pattern"])
+        self.mapper = FieldMapper(settings["fields"], settings.get("items"))
+        self.next_path = compile_path(settings["next"]) if settings.get("next") else None
+        self.pagination = config.get("pagination")
+        self.timeout_ms = settings.get("timeout_ms", 10000)
+        self.base_url = base_url
+        self._cache_kind = parse_scope("capture", settings)
+
+    def matches(self, response) -> bool:
+        return bool(self.pattern.search(response.url))
+
+    def _result(self, url: str, payloads: List[Any], next_href: Optional[str]) -> PageExtract:
+        items = []
+        for payload in payloads:
+            items.extend(self.mapper.records(payload))
+
+        if self.next_path is not None:
+            value = resolve(payloads[-1], self.next_path)
+            next_href = str(value) if value not in (None, "", False) else None
+
+        next_url = urljoin(self.base_url, next_href.strip()) if next_href is not None else None
+        return PageExtract(url, items, next_url)
+
+    def cached(self, url: str) -> Optional[PageExtract]:
+        body = response_cache.get(url, kind=self._cache_kind)
+        if body is None:
+            return None
+        stored = json.loads(body)
+        return self._result(url, stored["payloads"], stored["next"])
+
+    def finish(self, url: str, payloads: List[Any], next_href: Optional[str]) -> Optional[PageExtract]:
+        """
+        PageExtract from the captured payloads, or None to fall back to the DOM.
+        """
+        if not payloads:
+            self.misses += 1
+            print(f"[capture] No JSON response matched {self.pattern.pattern!r}; using the DOM")
+            return None
+
+        self.captured += 1
+        response_cache.put(url, json.dumps({"payloads": payloads, "next": next_href}), kind=self._cache_kind)
+        return self._result(url, payloads, next_href)
+
+    def start(self, page) -> Recorder:
+        """
+        Begin recording matching responses; call before page.goto.
+        """
+        return Recorder(self, page)
+
+    # --- playwright.sync_api ---
+
+    def stop(self, page, recorder: Recorder, url: str,
+             wait: Optional[WaitStrategy] = None) -> Optional[PageExtract]:
+        """
+        Detach the listener, wait for a matching response if none came in
+        during the load, and map the payloads. Without a "next" path the next
+        link is read from the DOM, after `wait` (the listing's usual content
+        wait) so a JS-built pager exists by then.
+        """
+        recorder.detach()
+        matched = recorder.responses
+        if not matched:
+            try:
+                matched.append(page.wait_for_event(
+                    "response", predicate=self.matches, timeout=self.timeout_ms
+                ))
+            except Exception:
+                pass
+
+        payloads = []
+        for response in matched:
+            try:
+                payloads.append(response.json())
+            except Exception:
+                continue
+
+        next_href = None
+        if payloads and self.next_path is None and self.pagination:
+            if wait is not None:
+                wait.wait(page)
+            try:
+                next_href = page.evaluate(
+                    NEXT_LINK_SCRIPT,
+                    [self.pagination["selector"], self.pagination.get("attr", "href")],
+                )
+            except Exception:
+                next_href = None
+
+        return self.finish(url, payloads, next_href)
+
+    # --- playwright.async_api ---
+
+    async def stop_async(self, page, recorder: Recorder, url: str,
+                         wait: Optional[WaitStrategy] = None) -> Optional[PageExtract]:
+        recorder.detach()
+        matched = recorder.responses
+        if not matched:
+            try:
+                matched.append(await page.wait_for_event(
+                    "response", predicate=self.matches, timeout=self.timeout_ms
+                ))
+            except Exception:
+                pass
+
+        payloads = []
+        for response in matched:
+            try:
+                payloads.append(await response.json())
+            except Exception:
+                continue
+
+        next_href = None
+        if payloads and self.next_path is None and self.pagination:
+            if wait is not None:
+                await wait.wait_async(page)
+            try:
+                next_href = await page.evaluate(
+                    NEXT_LINK_SCRIPT,
+                    [self.pagination["selector"], self.pagination.get("attr", "href")],
+                )
+            except Exception:
+                next_href = None
+
+        return self.finish(url, payloads, next_href)
+
+    def stats(self) -> Dict[str, int]:
+        return {"captured": self.captured, "misses": self.misses}
+
+
+# JSON capture for rendered listings of the current site config
+response_capture = ResponseCapture()
@@ -0,0 +1,152 @@
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+class RetryLater(Exception):
+    def __init__(self, url: str, reason: str, retry_after: Optional[float] = None):
+        """
+        Raised by the fetch layer for transient failures (429/503, 5xx, network errors).
+        retry_after: server-requested delay in seconds, if it sent one
+        """
+        super().__init__(f"{reason} ({url})")
+        self.url = url
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After as seconds: either delta-seconds or an HTTP-date.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryQueue:
+    def __init__(
+        self,
+        dead_letter_path: str = "dead_letter.jsonl",
+        max_attempts: int = 4,
+        host_budget: int = 100,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        """
+        dead_letter_path: JSONL file for URLs that exhausted their retries
+        max_attempts: attempts per URL, including the first one
+        host_budget: total retries allowed per host over the whole crawl
+        base_delay / max_delay: bounds for decorrelated-jitter backoff
+        """
+        self.dead_letter_path = dead_letter_path
+        self.max_attempts = max_attempts
+        self.host_budget = host_budget
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_lettered = 0
+        self._heap: List[Any] = []
+        self._seq = itertools.count()
+        self._host_retries: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def next_delay(self, job: Dict[str, Any], error: RetryLater) -> Optional[float]:
+        """
+        Record a failed attempt on `job` and return how long to wait before the
+        next one, or None if the job was dead-lettered instead.
+        """
+        host = urlsplit(job["url"]).netloc.lower()
+        job["attempts"] = job.get("attempts", 0) + 1
+
+        with self._lock:
+            retries = self._host_retries.get(host, 0)
+            exhausted = job["attempts"] >= self.max_attempts or retries >= self.host_budget
+            if not exhausted:
+                self._host_retries[host] = retries + 1
+
+        if exhausted:
+            self.dead_letter(job, error.reason)
+            return None
+
+        if error.retry_after is not None:
+            delay = min(error.retry_after, self.max_delay)
+        else:
+            # Decorrelated jitter: random between base and 3x the previous delay
+            previous = job.get("delay", self.base_delay)
+            delay = min(self.max_delay, random.uniform(self.base_delay, previous * 3))
+
+        job["delay"] = delay
+        print(f"[retry] {job['url']}: {error.reason}; retrying in {delay:.1f}s")
+        return delay
+
+    def defer(self, job: Dict[str, Any], error: RetryLater) -> bool:
+        """
+        Queue `job` for a later attempt. Returns False if it was dead-lettered.
+        """
+        delay = self.next_delay(job, error)
+        if delay is None:
+            return False
+
+        with self._lock:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+        return True
+
+    def pop_ready(self) -> List[Dict[str, Any]]:
+        """
+        Remove and return every job whose retry time has passed.
+        """
+        ready = []
+        now = time.monotonic()
+
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                ready.append(heapq.heappop(self._heap)[2])
+
+        return ready
+
+    def wait_ready(self) -> List[Dict[str, Any]]:
+        """
+        Sleep until the earliest queued job is due, then pop everything ready.
+        """
+        with self._lock:
+            due = self._heap[0][0] if self._heap else None
+
+        if due is not None:
+            time.sleep(max(due - time.monotonic(), 0.0))
+        return self.pop_ready()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def dead_letter(self, job: Dict[str, Any], reason: str) -> None:
+        entry = {
+            "url": job["url"],
+            "kind": job.get("kind", "page"),
+            "attempts": job.get("attempts", 0),
+            "reason": reason,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+        job["dead_lettered"] = True
+
+        with self._lock:
+            self.dead_lettered += 1
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        print(f"[retry] Giving up on {job['url']} after {entry['attempts']} attempts: {reason}")
@@ -0,0 +1,98 @@
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class SessionPool:
+    def __init__(self, headers: Optional[Dict[str, str]] = None, pool_connections: int = 4, pool_maxsize: int = 16):
+        """
+        headers: default headers applied to every session
+        pool_connections: number of urllib3 connection pools cached per session
+        pool_maxsize: max keep-alive connections kept open per host
+        """
+        self.headers = dict(headers or {})
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._sessions: Dict[Tuple[str, Optional[str]], requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update(self.headers)
+
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=False,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get_session(self, url: str, proxy: Optional[str] = None) -> requests.Session:
+        """
+        Return the keep-alive session for this host (and proxy), creating it once.
+        """
+        key = (self._host_key(url), proxy)
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._build_session()
+                if proxy:
+                    session.proxies.update({"http": proxy, "https": proxy})
+                self._sessions[key] = session
+
+        return session
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-session connection stats pulled from the urllib3 pools.
+        """
+        result = {}
+
+        with self._lock:
+            sessions = list(self._sessions.items())
+
+        for (host, proxy), session in sessions:
+            connections = 0
+            requests_sent = 0
+
+            managers = []
+            for adapter in set(session.adapters.values()):
+                if getattr(adapter, "poolmanager", None) is not None:
+                    managers.append(adapter.poolmanager)
+                managers.extend(getattr(adapter, "proxy_manager", {}).values())
+
+            for manager in managers:
+                for pool_key in list(manager.pools.keys()):
+                    pool = manager.pools.get(pool_key)
+                    if pool is None:
+                        continue
+                    connections += pool.num_connections
+                    requests_sent += pool.num_requests
+
+            label = f"{host} via {proxy}" if proxy else host
+            result[label] = {
+                "connections": connections,
+                "requests": requests_sent,
+                "reused": max(requests_sent - connections, 0),
+            }
+
+        return result
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+
+        for session in sessions:
+            session.close()
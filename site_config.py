@@ -0,0 +1,566 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urljoin
+
+import soupsieve
+from bs4 import SoupStrainer
+
+from item_filter import ListingFilters
+from json_path import compile_path
+from render_memory import RENDER_MODES
+from render_wait import WAIT_STRATEGIES
+from stream_parse import compile_page_stream, compile_stream
+from structured_data import StructuredRule, microdata_selector, microdata_value
+
+# "auto" streams pages when every selector allows it, "stream" insists (listings), "tree" never streams
+PARSE_ENGINES = ("auto", "stream", "tree")
+
+# Keys a field rule may carry (detail_fields ignore class_exclude / absolute, as before)
+FIELD_RULE_KEYS = {
+    "selector", "attr", "text", "class_exclude", "absolute",
+    "jsonld", "microdata", "script_json", "type", "script",
+}
+
+# What a rule reads: a CSS selector, or (detail_fields only) embedded structured data
+RULE_KINDS = ("selector", "jsonld", "microdata", "script_json")
+
+
+# detail_table defaults: the spec-table layout every detail page was parsed with so far
+DEFAULT_TABLE = {"table": "table.table-striped", "row": "tr", "key": "th", "value": "td", "normalize": "snake"}
+
+# Header text -> key
+KEY_NORMALIZERS = {
+    "snake": lambda text: text.lower().replace(" ", "_"),
+    "slug": lambda text: re.sub(r"[^0-9a-z]+", "_", text.lower()).strip("_"),
+    "lower": str.lower,
+    "none": lambda text: text,
+}
+
+# Keys of the render section, its capture sub-section, wait strategies and the api section
+RENDER_KEYS = {"mode", "learn_after", "reprobe_every", "wait", "detail_wait", "block", "extract", "capture"}
+CAPTURE_KEYS = {"url_pattern", "items", "fields", "next", "timeout_ms"}
+WAIT_KEYS = {"strategy", "selector", "min_count", "quiet_ms", "timeout_ms", "wait_until"}
+API_KEYS = {"url", "start_url", "start_page", "page_step", "items", "fields", "next", "has_next"}
+
+# tag, .class and #id only: what a SoupStrainer can test without the rest of the tree
+_COMPOUND_RE = re.compile(r"\s*(?P<tag>[a-zA-Z][\w-]*)?(?P<rest>(?:[.#][\w-]+)*)")
+
+# Pseudo-classes that look at siblings or the document root, which a partial tree doesn't keep
+_STRUCTURAL_RE = re.compile(r":(?:nth-|first-|last-|only-|root\b)", re.IGNORECASE)
+
+
+class ConfigError(ValueError):
+    """
+    A site config that can't be used; raised at load time, not mid-crawl.
+    """
+
+
+def compile_selector(where: str, selector: Any) -> soupsieve.SoupSieve:
+    if not isinstance(selector, str) or not selector.strip():
+        raise ConfigError(f"{where}: selector must be a non-empty string")
+    try:
+        return soupsieve.compile(selector)
+    except soupsieve.SelectorSyntaxError as e:
+        raise ConfigError(f"{where}: bad selector {selector!r}: {e}") from None
+
+
+def _reads_text(rules: Dict[str, Any], detail: bool) -> bool:
+    # Precedence matches parse_items / parse_detail_page: attr, then text, then class_exclude
+    return "attr" not in rules and bool(rules.get("text") or detail or "class_exclude" not in rules)
+
+
+def _extractor(rules: Dict[str, Any], detail: bool) -> Callable[[Any, str], Any]:
+    """
+    The value function for one rule, with the rule-key checks done once.
+    """
+    if "attr" in rules:
+        attr = rules["attr"]
+
+        def extract(el):
+            return el.get(attr, "").strip()
+    elif _reads_text(rules, detail):
+        def extract(el):
+            return el.get_text(strip=True)
+    else:
+        exclude = rules["class_exclude"]
+
+        def extract(el):
+            return next((c for c in el.get("class", []) if c not in exclude), "")
+
+    if not detail and rules.get("absolute"):
+        def value(el, base_url):
+            return urljoin(base_url, extract(el))
+    else:
+        def value(el, base_url):
+            return extract(el)
+
+    return value
+
+
+class FieldRule:
+    __slots__ = ("name", "selector", "extract", "reads_text")
+
+    def __init__(self, name: str, selector: soupsieve.SoupSieve, extract: Callable[[Any, str], Any],
+                 reads_text: bool = False):
+        self.name = name
+        self.selector = selector
+        self.extract = extract
+        # extract needs the element's text, not just its attributes
+        self.reads_text = reads_text
+
+
+def _first_in_row(where: str, selector: Any) -> Callable[[Any], Any]:
+    """
+    First match inside a row. A bare tag name is a plain find(), which is
+    much cheaper than a soupsieve match for the same element.
+    """
+    compiled = compile_selector(where, selector)
+    if re.fullmatch(r"[a-zA-Z][\w-]*", selector.strip()):
+        name = selector.strip().lower()
+        return lambda row: row.find(name)
+    return compiled.select_one
+
+
+class TableRule:
+    """
+    detail_table compiled: key/value rows of spec tables. Each distinct
+    header text is normalized (and renamed or dropped) once, then remembered
+    for every later page.
+    """
+
+    def __init__(self, settings: Dict[str, Any]):
+        unknown = set(settings) - set(DEFAULT_TABLE) - {"keys"}
+        if unknown:
+            raise ConfigError(
+                f"detail_table: unknown keys {sorted(unknown)} (allowed: {sorted(set(DEFAULT_TABLE) | {'keys'})})"
+            )
+        self.settings = {**DEFAULT_TABLE, **settings}
+        table, row = self.settings["table"], self.settings["row"]
+        compile_selector("detail_table.table", table)
+        compile_selector("detail_table.row", row)
+        # :is() only when a selector list needs grouping; the plain form matches faster
+        joined = f":is({table}) :is({row})" if "," in table + row else f"{table} {row}"
+        self.rows = compile_selector("detail_table", joined)
+        self.key = _first_in_row("detail_table.key", self.settings["key"])
+        self.value = _first_in_row("detail_table.value", self.settings["value"])
+
+        normalize = self.settings["normalize"]
+        if normalize not in KEY_NORMALIZERS:
+            raise ConfigError(f"detail_table.normalize: expected one of {sorted(KEY_NORMALIZERS)}, got {normalize!r}")
+        self.normalize = KEY_NORMALIZERS[normalize]
+
+        # A list keeps only those (normalized) keys; a mapping also renames them
+        keys = self.settings.get("keys")
+        if keys is None:
+            self.rename: Optional[Dict[str, str]] = None
+        elif isinstance(keys, list):
+            self.rename = {key: key for key in keys}
+        elif isinstance(keys, dict):
+            self.rename = dict(keys)
+        else:
+            raise ConfigError("detail_table.keys: expected a list of keys or an object renaming them")
+
+        # The table tag a page must contain for any row to match, when the selector names one
+        match = _COMPOUND_RE.match(table)
+        self.marker = None
+        if match.group("tag") and "," not in table:
+            self.marker = re.compile(f"<{match.group('tag')}\\b", re.IGNORECASE)
+
+        self._keys: Dict[str, Optional[str]] = {}
+
+    def output_key(self, header: str) -> Optional[str]:
+        """
+        The record key for a header cell's text; None drops the row.
+        """
+        try:
+            return self._keys[header]
+        except KeyError:
+            pass
+        key = self.normalize(header)
+        if self.rename is not None:
+            key = self.rename.get(key)
+        self._keys[header] = key
+        return key
+
+
+class CompiledFields(dict):
+    """
+    A fields / detail_fields section, still the plain mapping it was loaded
+    as, plus .rules: one FieldRule per selector or microdata field, and
+    .structured: one StructuredRule per jsonld / script_json field, each in
+    config order. Detail sections also get .stream, their tree-free plan.
+    """
+
+    def __init__(self, section: str, fields: Any, detail: bool = False, stream: bool = True):
+        if not isinstance(fields, dict) or not fields:
+            raise ConfigError(f"{section}: expected a non-empty object of field rules")
+        super().__init__(fields)
+
+        self.rules: List[FieldRule] = []
+        self.structured: List[StructuredRule] = []
+        for name, rules in fields.items():
+            where = f"{section}.{name}"
+            if not isinstance(rules, dict):
+                raise ConfigError(f"{where}: expected an object")
+            unknown = set(rules) - FIELD_RULE_KEYS
+            if unknown:
+                raise ConfigError(f"{where}: unknown keys {sorted(unknown)} (allowed: {sorted(FIELD_RULE_KEYS)})")
+            if "attr" in rules and not isinstance(rules["attr"], str):
+                raise ConfigError(f"{where}.attr: expected a string")
+            if "class_exclude" in rules and not isinstance(rules["class_exclude"], list):
+                raise ConfigError(f"{where}.class_exclude: expected a list")
+
+            kinds = [kind for kind in RULE_KINDS if kind in rules]
+            if len(kinds) > 1:
+                raise ConfigError(f"{where}: use only one of {', '.join(RULE_KINDS)}")
+            kind = kinds[0] if kinds else "selector"
+            if kind != "selector" and not detail:
+                raise ConfigError(f"{where}: {kind} rules are only supported in detail_fields")
+
+            if kind == "selector":
+                self.rules.append(FieldRule(
+                    name, compile_selector(f"{where}.selector", rules.get("selector")),
+                    _extractor(rules, detail), _reads_text(rules, detail),
+                ))
+            elif kind == "microdata":
+                if not isinstance(rules["microdata"], str) or not rules["microdata"]:
+                    raise ConfigError(f"{where}.microdata: expected an itemprop name")
+                selector = microdata_selector(rules["microdata"], rules.get("type"))
+                self.rules.append(FieldRule(
+                    name, compile_selector(f"{where}.microdata", selector), microdata_value, True,
+                ))
+            else:
+                try:
+                    self.structured.append(StructuredRule(name, rules))
+                except ValueError as e:
+                    raise ConfigError(f"{where}: {e}") from None
+
+        # Key/value spec-table rows merged under detail_fields (SiteConfig sets detail_table)
+        self.table: Optional[TableRule] = DEFAULT_TABLE_RULE if detail else None
+
+        self.stream = None
+        if detail and stream and self.rules:
+            self.stream, _ = compile_page_stream(self.rules)
+
+
+class SiteConfig(dict):
+    """
+    A validated site config. Reads like the JSON it came from; the selectors
+    are precompiled soupsieve patterns and field rules are extractor callables.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        if not isinstance(config, dict):
+            raise ConfigError("site config must be a JSON object")
+        super().__init__(config)
+
+        self.item_selector = compile_selector("item_selector", config.get("item_selector"))
+        self["fields"] = CompiledFields("fields", config.get("fields"))
+
+        self.pagination: Optional[soupsieve.SoupSieve] = None
+        self.pagination_attr = "href"
+        pagination = config.get("pagination")
+        if pagination:
+            if not isinstance(pagination, dict):
+                raise ConfigError("pagination: expected an object")
+            self.pagination = compile_selector("pagination.selector", pagination.get("selector"))
+            self.pagination_attr = pagination.get("attr", "href")
+
+        engine = config.get("parse_engine", "auto")
+        if engine not in PARSE_ENGINES:
+            raise ConfigError(f"parse_engine: expected one of {list(PARSE_ENGINES)}, got {engine!r}")
+
+        if config.get("detail_fields"):
+            self["detail_fields"] = CompiledFields(
+                "detail_fields", config["detail_fields"], detail=True, stream=engine != "tree"
+            )
+
+        table = config.get("detail_table")
+        if table is not None and table is not False and not isinstance(table, dict):
+            raise ConfigError("detail_table: expected an object, or false to skip table rows")
+        if "detail_fields" in self:
+            self["detail_fields"].table = None if table is False else TableRule(table or {})
+
+        # Checked on listing fields before any detail page is fetched
+        self.filters: Optional[ListingFilters] = None
+        filters = config.get("filters")
+        if filters is not None and not isinstance(filters, dict):
+            raise ConfigError("filters: expected an object of field filters")
+        if filters:
+            try:
+                self.filters = ListingFilters(filters, self["fields"])
+            except ValueError as e:
+                raise ConfigError(f"filters.{e}") from None
+
+        check_render(config.get("render"))
+        check_api(config.get("api"))
+
+        self.parse_only = compile_parse_only(config)
+
+        if engine == "tree":
+            self.stream, self.stream_reason = None, 'parse_engine is "tree"'
+        else:
+            self.stream, self.stream_reason = compile_stream(self)
+            if self.stream is None and engine == "stream":
+                raise ConfigError(f"parse_engine: {self.stream_reason}")
+
+
+def _top_level(selector: str) -> List[tuple]:
+    """
+    (index, char) of each character outside brackets, parentheses and quotes.
+    """
+    chars, depth, quote = [], 0, None
+    for i, ch in enumerate(selector):
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "\"'":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif depth == 0:
+            chars.append((i, ch))
+    return chars
+
+
+def _split_list(selector: str) -> List[str]:
+    # "a, b" -> ["a", "b"], leaving commas inside :is(...) / [attr="x,y"] alone
+    cuts = [i for i, ch in _top_level(selector) if ch == ","]
+    bounds = zip([-1] + cuts, cuts + [len(selector)])
+    return [selector[start + 1:end].strip() for start, end in bounds]
+
+
+def _leading_compound(selector: str) -> tuple:
+    """
+    (leading compound, the combinator after it: " ", ">", "+", "~" or None).
+    """
+    selector = selector.strip()
+    for i, ch in _top_level(selector):
+        if ch.isspace() or ch in ">+~":
+            combinator = selector[i:].strip()[:1]
+            return selector[:i], combinator if combinator in (">", "+", "~") else " "
+    return selector, None
+
+
+def _check_keys(where: str, section: Any, allowed: set) -> None:
+    if not isinstance(section, dict):
+        raise ConfigError(f"{where}: expected an object")
+    unknown = set(section) - allowed
+    if unknown:
+        raise ConfigError(f"{where}: unknown keys {sorted(unknown)} (allowed: {sorted(allowed)})")
+
+
+def _check_number(where: str, value: Any, minimum: float = 0) -> None:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+        raise ConfigError(f"{where}: expected a number >= {minimum}, got {value!r}")
+
+
+def _check_path(where: str, path: Any) -> None:
+    if not isinstance(path, str):
+        raise ConfigError(f"{where}: expected a JSON path string")
+    try:
+        compile_path(path)
+    except ValueError as e:
+        raise ConfigError(f"{where}: {e}") from None
+
+
+def _check_mapping(where: str, section: Dict[str, Any]) -> None:
+    # "items" + "fields": JSON paths mapped to records (json_path.FieldMapper)
+    if "items" in section:
+        _check_path(f"{where}.items", section["items"])
+    fields = section.get("fields")
+    if not isinstance(fields, dict) or not fields:
+        raise ConfigError(f"{where}.fields: expected a non-empty object of field -> JSON path")
+    for name, path in fields.items():
+        _check_path(f"{where}.fields.{name}", path)
+
+
+def _check_wait(where: str, settings: Any, default_selector: bool) -> None:
+    if settings is None:
+        return
+    if isinstance(settings, str):
+        settings = {"strategy": settings}
+    _check_keys(where, settings, WAIT_KEYS)
+    strategy = settings.get("strategy")
+    if strategy is not None and strategy not in WAIT_STRATEGIES:
+        raise ConfigError(f"{where}.strategy: expected one of {list(WAIT_STRATEGIES)}, got {strategy!r}")
+    if "selector" in settings:
+        if not isinstance(settings["selector"], str) or not settings["selector"].strip():
+            raise ConfigError(f"{where}.selector: expected a non-empty string")
+    elif strategy == "selector" and not default_selector:
+        raise ConfigError(f'{where}: strategy "selector" needs a selector')
+    for key in ("min_count", "quiet_ms", "timeout_ms"):
+        if key in settings:
+            _check_number(f"{where}.{key}", settings[key])
+
+
+def check_render(render: Any) -> None:
+    """
+    The render section, checked here so a typo stops the run at load time
+    instead of raising from render_wait / render_memory / response_capture.
+    """
+    if render is None:
+        return
+    _check_keys("render", render, RENDER_KEYS)
+
+    if "mode" in render and render["mode"] not in RENDER_MODES:
+        raise ConfigError(f"render.mode: expected one of {list(RENDER_MODES)}, got {render['mode']!r}")
+    for key in ("learn_after", "reprobe_every"):
+        if key in render:
+            _check_number(f"render.{key}", render[key], minimum=1)
+
+    # Listing waits default to item_selector; detail pages have no default selector
+    _check_wait("render.wait", render.get("wait"), default_selector=True)
+    _check_wait("render.detail_wait", render.get("detail_wait"), default_selector=False)
+
+    block = render.get("block")
+    if block is not None and block is not False:
+        _check_keys("render.block", block, {"resource_types", "domains"})
+        for key, values in block.items():
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                raise ConfigError(f"render.block.{key}: expected a list of strings")
+
+    if "extract" in render and render["extract"] != "browser":
+        raise ConfigError(f'render.extract: expected "browser", got {render["extract"]!r}')
+
+    capture = render.get("capture")
+    if capture:
+        _check_keys("render.capture", capture, CAPTURE_KEYS)
+        pattern = capture.get("url_pattern")
+        if not isinstance(pattern, str) or not pattern:
+            raise ConfigError("render.capture.url_pattern: expected a regular expression string")
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ConfigError(f"render.capture.url_pattern: bad pattern {pattern!r}: {e}") from None
+        _check_mapping("render.capture", capture)
+        if capture.get("next"):
+            _check_path("render.capture.next", capture["next"])
+        if "timeout_ms" in capture:
+            _check_number("render.capture.timeout_ms", capture["timeout_ms"])
+
+
+def check_api(api: Any) -> None:
+    """
+    The api section written by --discover-api (or by hand).
+    """
+    if not api:
+        return
+    _check_keys("api", api, API_KEYS)
+
+    url = api.get("url")
+    if not isinstance(url, str) or not url:
+        raise ConfigError("api.url: expected the endpoint URL, with {page} or {cursor} where it varies")
+    if "start_url" in api and not isinstance(api["start_url"], str):
+        raise ConfigError("api.start_url: expected a URL string")
+    for key in ("start_page", "page_step"):
+        if key in api and (isinstance(api[key], bool) or not isinstance(api[key], int)):
+            raise ConfigError(f"api.{key}: expected an integer, got {api[key]!r}")
+    _check_mapping("api", api)
+    for key in ("next", "has_next"):
+        if key in api:
+            _check_path(f"api.{key}", api[key])
+    if "{cursor}" in url and "next" not in api:
+        raise ConfigError('api.url: {cursor} needs "next", the path to the cursor in each payload')
+
+
+def _container(where: str, selector: str, whole: bool) -> Dict[str, Any]:
+    """
+    The leading compound of a selector as {tag, classes, id}. With whole=True
+    the selector must be just that compound.
+    """
+    match = _COMPOUND_RE.match(selector)
+    rest = selector[match.end():].strip()
+    leading, _ = _leading_compound(selector)
+    if not (match.group("tag") or match.group("rest")) or "," in selector or \
+            (whole and rest) or rest[:1] in ("+", "~") or _STRUCTURAL_RE.search(leading):
+        raise ConfigError(
+            f"{where}: {selector!r} can't scope parsing; parse_only needs containers "
+            f"like \"article.product_pod\" (tag, .class, #id)"
+        )
+
+    parts = re.findall(r"([.#])([\w-]+)", match.group("rest"))
+    return {
+        "tag": (match.group("tag") or "").lower() or None,
+        "classes": {name for kind, name in parts if kind == "."},
+        "id": next((name for kind, name in parts if kind == "#"), None),
+    }
+
+
+def compile_parse_only(config: Dict[str, Any]) -> Optional[SoupStrainer]:
+    """
+    parse_only: a list of container selectors, or "auto" for the leading
+    compounds of item_selector and the pagination selector. Listing trees are
+    then built from those regions only. The strainer may keep a little more
+    than asked (tags, classes and ids are tested independently), never less.
+
+    Under "auto" a field selector may name an ancestor of the item ("li h3 a"),
+    so the leading compound of every field with a descendant or child
+    combinator is kept as well. Selectors whose match depends on siblings
+    outside the kept regions (:nth-child and friends on a container) are a
+    ConfigError naming them. A list is taken as given: its containers must
+    hold everything the selectors look at.
+    """
+    setting = config.get("parse_only")
+    if not setting:
+        return None
+
+    if setting == "auto":
+        selectors = [("item_selector", config["item_selector"])]
+        if config.get("pagination"):
+            selectors.append(("pagination.selector", config["pagination"]["selector"]))
+        for name, rules in config["fields"].items():
+            for part in _split_list(rules.get("selector") or ""):
+                leading, combinator = _leading_compound(part)
+                if combinator in (" ", ">"):
+                    selectors.append((f"fields.{name}", leading))
+        containers = [_container(f"parse_only auto ({where})", sel, whole=False) for where, sel in selectors]
+    elif isinstance(setting, list):
+        containers = [_container(f"parse_only[{i}]", sel, whole=True) for i, sel in enumerate(setting)]
+    else:
+        raise ConfigError('parse_only: expected "auto" or a list of container selectors')
+
+    tags = None
+    if all(c["tag"] for c in containers):
+        tags = sorted({c["tag"] for c in containers})
+
+    attrs = {}
+    if all(c["classes"] for c in containers):
+        wanted = [c["classes"] for c in containers]
+        attrs["class"] = lambda value: value is not None and any(
+            classes <= set(value.split()) for classes in wanted
+        )
+    elif all(c["id"] for c in containers):
+        attrs["id"] = [c["id"] for c in containers]
+
+    return SoupStrainer(tags, attrs)
+
+
+DEFAULT_TABLE_RULE = TableRule({})
+
+
+def compile_config(config: Dict[str, Any]) -> SiteConfig:
+    return config if isinstance(config, SiteConfig) else SiteConfig(config)
+
+
+def compile_fields(fields: Dict[str, Any], detail: bool = True) -> CompiledFields:
+    if isinstance(fields, CompiledFields):
+        return fields
+    return CompiledFields("detail_fields" if detail else "fields", fields, detail)
+
+
+def load_config(path: str) -> SiteConfig:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except OSError as e:
+        raise ConfigError(f"{path}: {e.strerror}") from None
+    except ValueError as e:
+        raise ConfigError(f"{path}: invalid JSON: {e}") from None
+
+    try:
+        return SiteConfig(config)
+    except ConfigError as e:
+        raise ConfigError(f"{path}: {e}") from None
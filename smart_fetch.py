@@ -1,45 +1,162 @@
 from fetch import fetch_url
+from cache import response_cache
 from browser_fetch import fetch_rendered_html
-from bs4 import BeautifulSoup
+from render_wait import render_waits
+from browser_extract import PageExtract, browser_extractor
+from response_capture import response_capture
+from api_discovery import api_source
+from render_memory import render_memory
+from document import Document
+import re
 
-def smart_fetch(url: str) -> str | None:
+ANTI_BOT_SIGNALS = (
+    "captcha", "verify you are human", "unusual traffic",
+    "access denied", "forbidden", "cloudflare", "attention required",
+)
+
+_SIGNALS = "|".join(re.escape(signal) for signal in ANTI_BOT_SIGNALS)
+
+# One pass over the page: every event the heuristics need, in a single alternation.
+# Script bodies and comments hold no tags, so they are only searched for text.
+_SCAN_RE = re.compile(
+    r"(?P<signal>" + _SIGNALS + r")"
+    r"|<!--"
+    r"|<(?P<script>script)\b"
+    r"|<[a-z][^\s/>]*"
+    r"|\sclass\s*=\s*(?:\"(?P<dq>[^\"]*)\"|'(?P<sq>[^']*)'|(?P<bare>[^\s>]+))"
+    r"|(?P<quotes>quotes to scrape)",
+    re.IGNORECASE,
+)
+_TEXT_RE = re.compile(r"(?P<signal>" + _SIGNALS + r")|quotes to scrape", re.IGNORECASE)
+# Longest text a _TEXT_RE match can span, for matches that start inside a consumed token
+_TEXT_SPAN = max(len(text) for text in (*ANTI_BOT_SIGNALS, "quotes to scrape"))
+_SCRIPT_END_RE = re.compile(r"</script", re.IGNORECASE)
+
+
+def render_reason(html: str) -> str | None:
     """
-    Fetch a URL using static requests first.
-    If content is missing, JS-rendered, or anti-bot,
-    retry using Playwright.
+    Why this static HTML needs a browser render, or None if it is usable as-is.
+    A single regex scan; no tree is built.
     """
+    script_count = 0
+    tag_count = 0
+    quotes_title = False
+    quote_blocks = False
 
-    html = fetch_url(url)
+    pos = 0
+    while True:
+        match = _SCAN_RE.search(html, pos)
+        if match is None:
+            break
+        pos = match.end()
 
-    if html is None:
-        print("[smart_fetch] Static fetch failed; using Playwright...")
-        return fetch_rendered_html(url)
+        # --- Anti-bot detection ---
+        if match.group("signal"):
+            return "Anti-bot page detected"
 
-    soup = BeautifulSoup(html, "html.parser")
-    text_content = soup.get_text(strip=True)
-    lower_html = html.lower()
+        token = match.group(0)
 
-    # --- Anti-bot detection ---
-    anti_bot_signals = [
-        "captcha", "verify you are human", "unusual traffic",
-        "access denied", "forbidden", "cloudflare", "attention required",
-    ]
-    if any(signal in lower_html for signal in anti_bot_signals):
-        print("[smart_fetch] Anti-bot page detected; switching to Playwright...")
-        return fetch_rendered_html(url)
+        # Tag names and class values are consumed whole, but a signal can sit
+        # inside them (<div class="g-recaptcha">), so they are searched as text
+        if token != "<!--" and not match.group("quotes"):
+            end = min(len(html), match.end() + _TEXT_SPAN)
+            for text in _TEXT_RE.finditer(html, match.start(), end):
+                if text.start() >= match.end():
+                    break
+                if text.group("signal"):
+                    return "Anti-bot page detected"
+                quotes_title = True
 
-    # --- JS-rendered detection: script-heavy DOM ---
-    script_count = len(soup.find_all("script"))
-    tag_count = len(soup.find_all())
+        skip_to = None
+        if token == "<!--":
+            end = html.find("-->", pos)
+            skip_to = len(html) if end < 0 else end + 3
+        elif token[0] == "<":
+            tag_count += 1
+            if match.group("script"):
+                script_count += 1
+                end = _SCRIPT_END_RE.search(html, pos)
+                skip_to = len(html) if end is None else end.end()
+        elif match.group("quotes"):
+            quotes_title = True
+        else:
+            classes = match.group("dq") or match.group("sq") or match.group("bare") or ""
+            if "quote" in classes.split():
+                quote_blocks = True
+
+        if skip_to is not None:
+            for text in _TEXT_RE.finditer(html, pos, skip_to):
+                if text.group("signal"):
+                    return "Anti-bot page detected"
+                quotes_title = True
+            pos = skip_to
 
+    # --- JS-rendered detection: script-heavy DOM ---
     if script_count > 5 and tag_count < 30:
-        print("[smart_fetch] Script-heavy, low-content page detected; using Playwright...")
-        return fetch_rendered_html(url)
+        return "Script-heavy, low-content page detected"
 
     # --- Specific detection for quotes.toscrape.com/js/ ---
-    if "quotes to scrape" in lower_html and not soup.select(".quote"):
-        print("[smart_fetch] JS-only quotes page detected; using Playwright...")
-        return fetch_rendered_html(url)
+    if quotes_title and not quote_blocks:
+        return "JS-only quotes page detected"
+
+    return None
+
+
+def render_options(kind: str | None) -> dict:
+    """
+    Render arguments for this page kind ("list" / "detail"): its wait, plus
+    in-browser extraction and response capture for listings when enabled.
+    """
+    options = {"wait": render_waits.get(kind)}
+    if kind == "list":
+        options["extractor"] = browser_extractor if browser_extractor.enabled else None
+        options["capture"] = response_capture if response_capture.enabled else None
+    return options
+
+
+def render(url: str, kind: str | None = None) -> Document | PageExtract | None:
+    result = fetch_rendered_html(url, **render_options(kind))
+    return Document(result, url) if isinstance(result, str) else result
+
+
+def needs_render(url: str, kind: str | None, html: str | None) -> str | None:
+    """
+    Why a static fetch's html (None when it failed) should give way to a
+    browser render, or None to use it as-is. Each outcome is recorded in the
+    host's render memory, except in a replay, where every cache miss comes
+    back as None. Both engines decide through here.
+    """
+    reason = "Static fetch failed" if html is None else render_reason(html)
+    if not response_cache.replay:
+        render_memory.record(url, kind, reason is not None)
+    return reason if render_memory.may_render else None
+
+
+def smart_fetch(url: str, kind: str | None = None) -> Document | PageExtract | None:
+    """
+    Fetch a URL using static requests first (unless this host has learned
+    to need a browser). If content is missing, JS-rendered, or anti-bot,
+    retry using Playwright, waiting as configured for this page kind
+    ("list" / "detail"). Rendered listings come back as a PageExtract
+    when in-browser extraction is on, and every listing does when the
+    config has a discovered JSON "api" section.
+    Pages come back as a Document, so every parser shares one tree.
+    Transient static failures (429/503, 5xx, network) raise RetryLater.
+    """
+
+    if kind == "list" and api_source.enabled:
+        return api_source.fetch(url)
+
+    # Hosts that keep needing a browser skip the static attempt (render.mode)
+    if render_memory.skip_static(url, kind):
+        return render(url, kind)
+
+    html = fetch_url(url, kind)
+
+    reason = needs_render(url, kind, html)
+    if reason:
+        print(f"[smart_fetch] {reason}; using Playwright...")
+        return render(url, kind)
 
     # --- If we reach this point, static HTML is meaningful ---
-    return html
\ No newline at end of file
+    return Document(html, url) if html is not None else None
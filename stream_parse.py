@@ -0,0 +1,473 @@
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4.dammit import EntitySubstitution
+
+# The bs4 html.parser tree builder, mirrored so streamed records equal the
+# tree path's: these close at their start tag, and a stray end tag for one is dropped
+VOID_ELEMENTS = frozenset({
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr",
+    "image", "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid",
+    "param", "source", "spacer", "track", "wbr",
+})
+
+# Strings inside these belong to them: get_text of any other tag skips them
+STRING_CONTAINERS = frozenset({"script", "style", "template", "rt", "rp"})
+
+# Attributes bs4 splits into lists (per tag; "*" is every tag)
+MULTI_VALUED_ATTRS = {
+    "*": {"class", "accesskey", "dropzone"},
+    "a": {"rel", "rev"}, "link": {"rel", "rev"}, "area": {"rel"},
+    "td": {"headers"}, "th": {"headers"}, "form": {"accept-charset"},
+    "object": {"archive"}, "icon": {"sizes"}, "iframe": {"sandbox"}, "output": {"for"},
+}
+
+# String kinds: plain text and CDATA are what get_text reads outside a container
+TEXT, CDATA, OTHER = "text", "cdata", ""
+_PLAIN_KINDS = frozenset({TEXT, CDATA})
+
+# Selector subset: tag / * / .class / #id / [attr] / [attr op value], joined by " " or ">"
+_COMPOUND_RE = re.compile(
+    r"(\*|[a-zA-Z][\w-]*)?"
+    r"((?:[.#][\w-]+|\[\s*[\w-]+\s*(?:[~^$*|]?=\s*(?:\"[^\"\\]*\"|'[^'\\]*'|[\w-]+)\s*)?\])*)"
+)
+_PART_RE = re.compile(
+    r"([.#])([\w-]+)|\[\s*([\w-]+)\s*(?:([~^$*|]?=)\s*(?:\"([^\"]*)\"|'([^']*)'|([\w-]+))\s*)?\]"
+)
+_COMBINATOR_RE = re.compile(r"\s*>\s*|\s+")
+_CSS_SPACE_RE = re.compile(r"[ \t\r\n\f]+")
+
+_DECIMAL_REF_RE = re.compile(r"^([0-9]+)(.*)")
+_HEX_REF_RE = re.compile(r"^([0-9a-f]+)(.*)")
+
+
+class Unsupported(ValueError):
+    """
+    A selector or rule the streaming engine can't reproduce exactly.
+    """
+
+
+class Element:
+    """
+    One open tag. Answers .get / .get_text like a bs4 Tag, so the compiled
+    FieldRule extractors run on it unchanged.
+    """
+
+    __slots__ = ("name", "attrs", "_classes", "parts", "kinds", "pending")
+
+    def __init__(self, name: str, attrs: List[Tuple[str, Optional[str]]]):
+        self.name = name
+        # Duplicate attributes: the last one wins, valueless ones are "", as in bs4
+        self.attrs = {key: "" if value is None else value for key, value in attrs}
+        self._classes = None
+        self.parts: Optional[List[str]] = None
+        self.kinds = None
+        self.pending = None
+
+    @property
+    def classes(self) -> frozenset:
+        if self._classes is None:
+            self._classes = frozenset(self.attrs.get("class", "").split())
+        return self._classes
+
+    def is_multi_valued(self, key: str) -> bool:
+        return key in MULTI_VALUED_ATTRS["*"] or key in MULTI_VALUED_ATTRS.get(self.name, ())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self.attrs:
+            return default
+        value = self.attrs[key]
+        return value.split() if self.is_multi_valued(key) else value
+
+    def get_text(self, separator: str = "", strip: bool = True) -> str:
+        # parts are collected already stripped, as get_text(strip=True) wants them
+        return separator.join(self.parts or ())
+
+
+class Compound:
+    __slots__ = ("tag", "classes", "ids", "tests")
+
+    def __init__(self, tag: Optional[str], classes: frozenset, ids: Tuple[str, ...],
+                 tests: Tuple[Tuple[str, Optional[str], str], ...]):
+        self.tag = tag
+        self.classes = classes
+        self.ids = ids
+        self.tests = tests
+
+    def matches(self, el: Element) -> bool:
+        if self.tag is not None and el.name != self.tag:
+            return False
+        if self.classes and not self.classes <= el.classes:
+            return False
+        for id_ in self.ids:
+            if el.attrs.get("id") != id_:
+                return False
+        for name, op, expected in self.tests:
+            value = el.attrs.get(name)
+            if value is None:
+                return False
+            if op is None:
+                continue
+            if el.is_multi_valued(name):
+                value = " ".join(value.split())
+            if name == "type":
+                # soupsieve compares type="..." case-insensitively in HTML
+                value = value.lower()
+            if not _attr_test(op, value, expected):
+                return False
+        return True
+
+
+def _attr_test(op: str, value: str, expected: str) -> bool:
+    if op == "=":
+        return value == expected
+    if op == "|=":
+        return value == expected or value.startswith(expected + "-")
+    if not expected:
+        return False
+    if op == "~=":
+        return not _CSS_SPACE_RE.search(expected) and expected in _CSS_SPACE_RE.split(value)
+    if op == "^=":
+        return value.startswith(expected)
+    if op == "$=":
+        return value.endswith(expected)
+    return expected in value
+
+
+class Selector:
+    """
+    A compiled complex selector, matched right to left against the stack of
+    open tags (the new element's ancestors, exactly as in the finished tree).
+    """
+
+    __slots__ = ("pattern", "compounds", "combinators")
+
+    def __init__(self, pattern: str, compounds: List[Compound], combinators: List[str]):
+        self.pattern = pattern
+        self.compounds = compounds
+        self.combinators = combinators
+
+    def matches(self, stack: List[Element]) -> bool:
+        return self._at(stack, len(self.compounds) - 1, len(stack) - 1)
+
+    def _at(self, stack: List[Element], k: int, i: int) -> bool:
+        # compounds[k] matches stack[i], and the compounds left of it match its ancestors
+        if not self.compounds[k].matches(stack[i]):
+            return False
+        if k == 0:
+            return True
+        if self.combinators[k - 1] == ">":
+            return i > 0 and self._at(stack, k - 1, i - 1)
+        for j in range(i - 1, -1, -1):
+            if self._at(stack, k - 1, j):
+                return True
+        return False
+
+
+def _compound(text: str) -> Compound:
+    tag = None
+    classes, ids, tests = set(), [], []
+    match = _COMPOUND_RE.fullmatch(text)
+    if match.group(1) and match.group(1) != "*":
+        tag = match.group(1).lower()
+
+    for part in _PART_RE.finditer(match.group(2)):
+        kind, name, attr, op, dquoted, squoted, bare = part.groups()
+        if kind == ".":
+            classes.add(name)
+        elif kind == "#":
+            ids.append(name)
+        else:
+            attr = attr.lower()
+            expected = next((v for v in (dquoted, squoted, bare) if v is not None), "")
+            if attr == "type":
+                expected = expected.lower()
+            tests.append((attr, op, expected))
+
+    return Compound(tag, frozenset(classes), tuple(ids), tuple(tests))
+
+
+def compile_selector(selector: str) -> Selector:
+    """
+    Compile a selector of the streamable subset, or raise Unsupported.
+    """
+    unsupported = (
+        f"selector {selector!r} needs the tree (streaming handles tag, .class, #id "
+        f"and [attr] joined by descendant or child combinators)"
+    )
+    text = selector.strip()
+    compounds: List[Compound] = []
+    combinators: List[str] = []
+    pos = 0
+    while True:
+        match = _COMPOUND_RE.match(text, pos)
+        if match.end() == pos:
+            raise Unsupported(unsupported)
+        compounds.append(_compound(match.group(0)))
+        pos = match.end()
+        if pos == len(text):
+            return Selector(selector, compounds, combinators)
+
+        combinator = _COMBINATOR_RE.match(text, pos)
+        if combinator is None:
+            raise Unsupported(unsupported)
+        combinators.append(">" if ">" in combinator.group(0) else " ")
+        pos = combinator.end()
+
+
+class StreamPlan:
+    """
+    A site config's listing rules as selectors the tokenizer callbacks can
+    test: item_selector, one per field rule, and pagination. Without an item
+    selector the whole page is the one item (detail_fields).
+    """
+
+    def __init__(self, item: Optional[Selector], fields: List[Tuple[Selector, Any]],
+                 pagination: Optional[Selector], pagination_attr: str):
+        self.item = item
+        self.fields = fields
+        self.pagination = pagination
+        self.pagination_attr = pagination_attr
+
+    def parse(self, html: str, base_url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        (items, next href) of a listing in one pass, with no tree built. The
+        href is stripped but not joined, like find_next_page before urljoin.
+        """
+        parser = StreamParser(self, base_url)
+        parser.feed(html)
+        parser.close()
+        return parser.items, parser.next_href
+
+
+def compile_stream(site: Any) -> Tuple[Optional[StreamPlan], Optional[str]]:
+    """
+    StreamPlan for a SiteConfig, or (None, reason) when a rule needs the tree.
+    """
+    try:
+        item = compile_selector(site.item_selector.pattern)
+        fields = [(compile_selector(rule.selector.pattern), rule) for rule in site["fields"].rules]
+        pagination = compile_selector(site.pagination.pattern) if site.pagination is not None else None
+    except Unsupported as e:
+        return None, str(e)
+
+    return StreamPlan(item, fields, pagination, site.pagination_attr), None
+
+
+def compile_page_stream(rules: List[Any]) -> Tuple[Optional[StreamPlan], Optional[str]]:
+    """
+    StreamPlan reading each rule's first match on the whole page, as
+    parse_detail_page does; (None, reason) when a rule needs the tree.
+    """
+    try:
+        fields = [(compile_selector(rule.selector.pattern), rule) for rule in rules]
+    except Unsupported as e:
+        return None, str(e)
+
+    return StreamPlan(None, fields, None, "href"), None
+
+
+class _Block:
+    __slots__ = ("element", "record", "pending")
+
+    def __init__(self, element: Optional[Element], record: Dict[str, Any], pending: List[Tuple[Selector, Any]]):
+        self.element = element
+        self.record = record
+        self.pending = pending
+
+
+def _numeric_reference(name: str) -> Tuple[str, str]:
+    """
+    A numeric character reference the way bs4 decodes it: (character, trailing data).
+    """
+    base, pattern = 10, _DECIMAL_REF_RE
+    if name[:1] in ("x", "X"):
+        name, base, pattern = name[1:], 16, _HEX_REF_RE
+
+    extra = ""
+    try:
+        number = int(name, base)
+    except ValueError:
+        match = pattern.search(name)
+        if match is None:
+            return "", name
+        number, extra = int(match.group(1), base), match.group(2)
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd", extra
+    if 0x80 <= number <= 0x9F:
+        # Windows-1252 bytes written as references
+        try:
+            return bytes([number]).decode("cp1252"), extra
+        except UnicodeDecodeError:
+            pass
+    return chr(number), extra
+
+
+class StreamParser(HTMLParser):
+    """
+    Tokenizer callbacks that track only the open-tag stack and emit records
+    as matching tags open and close. Character references, void elements,
+    end tags and string boundaries are handled as bs4's html.parser builder does.
+    """
+
+    def __init__(self, plan: StreamPlan, base_url: str):
+        super().__init__(convert_charrefs=False)
+        self.plan = plan
+        self.base_url = base_url
+        self.items: List[Dict[str, Any]] = []
+        self.next_href: Optional[str] = None
+        self._next_found = plan.pagination is None
+        self._stack: List[Element] = []
+        self._blocks: List[_Block] = []
+        self._collecting: List[Element] = []
+        self._containers: List[Element] = []
+        self._data: List[str] = []
+        self._already_closed: List[str] = []
+
+        if plan.item is None:
+            record = {rule.name: "" for _, rule in plan.fields}
+            self.items.append(record)
+            self._blocks.append(_Block(None, record, list(plan.fields)))
+
+    # --- strings ---
+
+    def _flush(self, kind: str = TEXT) -> None:
+        """
+        End the current string (bs4's endData) and hand it to the open text readers.
+        """
+        if not self._data:
+            return
+        string = "".join(self._data).strip()
+        self._data = []
+        if not string or not self._collecting:
+            return
+        if kind == TEXT and self._containers:
+            kind = self._containers[-1].name
+        for el in self._collecting:
+            if kind in el.kinds:
+                el.parts.append(string)
+
+    def handle_data(self, data: str) -> None:
+        self._data.append(data)
+
+    def handle_entityref(self, name: str) -> None:
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self._data.append(character if character is not None else f"&{name}")
+
+    def handle_charref(self, name: str) -> None:
+        character, extra = _numeric_reference(name)
+        self._data.append(character)
+        self._data.append(extra)
+
+    def _special(self, data: str, kind: str) -> None:
+        self._flush()
+        self._data.append(data)
+        self._flush(kind)
+
+    def handle_comment(self, data: str) -> None:
+        self._special(data, OTHER)
+
+    def handle_decl(self, decl: str) -> None:
+        self._special(decl, OTHER)
+
+    def handle_pi(self, data: str) -> None:
+        self._special(data, OTHER)
+
+    def unknown_decl(self, data: str) -> None:
+        if data.upper().startswith("CDATA["):
+            self._special(data[len("CDATA["):], CDATA)
+        else:
+            self._special(data, OTHER)
+
+    # --- tags ---
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._open(tag, attrs)
+        if tag in VOID_ELEMENTS:
+            self._pop_to(tag)
+            self._already_closed.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._open(tag, attrs)
+        self._flush()
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._already_closed:
+            self._already_closed.remove(tag)
+            return
+        self._flush()
+        self._pop_to(tag)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+        while self._stack:
+            self._close(self._stack.pop())
+
+    def _open(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush()
+        el = Element(tag, attrs)
+        stack = self._stack
+        stack.append(el)
+        if tag in STRING_CONTAINERS:
+            self._containers.append(el)
+
+        # select_one(block): the first match, in document order, under each open item
+        for block in self._blocks:
+            pending = block.pending
+            if not pending:
+                continue
+            for entry in list(pending):
+                selector, rule = entry
+                if selector.matches(stack):
+                    pending.remove(entry)
+                    self._extract(el, block.record, rule)
+
+        plan = self.plan
+        if plan.item is not None and plan.item.matches(stack):
+            record = {rule.name: "" for _, rule in plan.fields}
+            self.items.append(record)
+            self._blocks.append(_Block(el, record, list(plan.fields)))
+
+        if not self._next_found and plan.pagination.matches(stack):
+            self._next_found = True
+            self.next_href = el.get(plan.pagination_attr, "").strip()
+
+    def _extract(self, el: Element, record: Dict[str, Any], rule: Any) -> None:
+        if not rule.reads_text:
+            record[rule.name] = rule.extract(el, self.base_url)
+            return
+
+        # The value is known once the element closes
+        if el.parts is None:
+            el.parts = []
+            el.kinds = {el.name} if el.name in STRING_CONTAINERS else _PLAIN_KINDS
+            el.pending = []
+            self._collecting.append(el)
+        el.pending.append((record, rule))
+
+    def _pop_to(self, tag: str) -> None:
+        """
+        Close the nearest open tag of this name and everything opened inside it;
+        an end tag with no open match closes nothing.
+        """
+        stack = self._stack
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i].name == tag:
+                while len(stack) > i:
+                    self._close(stack.pop())
+                return
+
+    def _close(self, el: Element) -> None:
+        if el.pending is not None:
+            self._collecting.remove(el)
+            for record, rule in el.pending:
+                record[rule.name] = rule.extract(el, self.base_url)
+            el.pending = None
+        if self._blocks and self._blocks[-1].element is el:
+            self._blocks.pop()
+        if self._containers and self._containers[-1] is el:
+            self._containers.pop()
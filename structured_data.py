@@ -0,0 +1,204 @@
+import json
+import re
+from html import unescape
+from typing import Any, Dict, List, Optional
+
+from json_path import compile_path, resolve
+
+# Script blocks found by one regex over the page; no tree. Comments are matched
+# too, so a commented-out script is skipped as a parser would skip it.
+_SCRIPT_RE = re.compile(r"<!--.*?-->|<script\b([^>]*)>(.*?)</script", re.IGNORECASE | re.DOTALL)
+_ATTR_RE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+
+# <!-- ... --> / <![CDATA[ ... ]]> wrappers some sites still put around script JSON
+_WRAPPER_RE = re.compile(r"^\s*(?://\s*)?(?:<!--|<!\[CDATA\[)|(?://\s*)?(?:-->|\]\]>)\s*$")
+
+_JSON = json.JSONDecoder(strict=False)
+
+# Where a microdata property keeps its value, by tag (the rest use their text)
+MICRODATA_VALUE_ATTRS = {
+    "meta": "content",
+    "a": "href", "area": "href", "link": "href",
+    "audio": "src", "embed": "src", "iframe": "src", "img": "src",
+    "source": "src", "track": "src", "video": "src",
+    "object": "data",
+    "data": "value", "meter": "value",
+    "time": "datetime",
+}
+
+STRUCTURED_KINDS = ("jsonld", "script_json")
+
+
+class Script:
+    __slots__ = ("attrs", "body")
+
+    def __init__(self, attrs: Dict[str, str], body: str):
+        self.attrs = attrs
+        self.body = body
+
+    @property
+    def type(self) -> str:
+        return self.attrs.get("type", "").strip().lower()
+
+
+def scan_scripts(html: str) -> List[Script]:
+    scripts = []
+    for match in _SCRIPT_RE.finditer(html):
+        if match.group(2) is None:
+            continue
+        attrs = {}
+        for attr in _ATTR_RE.finditer(match.group(1)):
+            name, dq, sq, bare = attr.groups()
+            value = next((v for v in (dq, sq, bare) if v is not None), "")
+            attrs.setdefault(name.lower(), unescape(value))
+        scripts.append(Script(attrs, match.group(2)))
+    return scripts
+
+
+def _loads(text: str, start: int = 0) -> Any:
+    """
+    The JSON value at text[start:] (trailing code ignored), or None.
+    """
+    try:
+        if start == 0:
+            return _JSON.decode(_WRAPPER_RE.sub("", text).strip())
+        return _JSON.raw_decode(text, start)[0]
+    except ValueError:
+        return None
+
+
+def _type_matches(node: Dict[str, Any], wanted: Optional[str]) -> bool:
+    if wanted is None:
+        return True
+    types = node.get("@type")
+    for t in types if isinstance(types, list) else [types]:
+        # "Product", "schema:Product" and "https://schema.org/Product" all name Product
+        if isinstance(t, str) and re.split(r"[/:#]", t)[-1] == wanted:
+            return True
+    return False
+
+
+class StructuredData:
+    """
+    The JSON a page embeds: JSON-LD nodes and named script payloads, read
+    from its script blocks on first use.
+    """
+
+    def __init__(self, html: str):
+        self.html = html
+        self._scripts: Optional[List[Script]] = None
+        self._jsonld: Optional[List[Dict[str, Any]]] = None
+        self._payloads: Dict[str, Any] = {}
+
+    @property
+    def scripts(self) -> List[Script]:
+        if self._scripts is None:
+            self._scripts = scan_scripts(self.html)
+        return self._scripts
+
+    def jsonld(self, type_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Every JSON-LD node (top-level and @graph members) of that @type, in page order.
+        """
+        if self._jsonld is None:
+            self._jsonld = []
+            for script in self.scripts:
+                if script.type != "application/ld+json":
+                    continue
+                data = _loads(script.body)
+                for node in data if isinstance(data, list) else [data]:
+                    if not isinstance(node, dict):
+                        continue
+                    self._jsonld.append(node)
+                    graph = node.get("@graph")
+                    if isinstance(graph, list):
+                        self._jsonld.extend(n for n in graph if isinstance(n, dict))
+        return [node for node in self._jsonld if _type_matches(node, type_name)]
+
+    def payload(self, name: str) -> Any:
+        """
+        App state embedded by a script: the JSON body of <script id=name>
+        (__NEXT_DATA__), or the value assigned to a global of that name
+        (window.__INITIAL_STATE__ = {...}, also through JSON.parse("...")).
+        """
+        if name not in self._payloads:
+            self._payloads[name] = self._find_payload(name)
+        return self._payloads[name]
+
+    def _find_payload(self, name: str) -> Any:
+        for script in self.scripts:
+            if script.attrs.get("id") == name:
+                return _loads(script.body)
+
+        variable = name[len("window."):] if name.startswith("window.") else name
+        assignment = re.compile(
+            r"(?:\bwindow\s*\.\s*|\bwindow\[\s*[\"']|(?<![\w$.]))" + re.escape(variable) +
+            r"(?:[\"']\s*\])?\s*=(?!=)\s*(JSON\.parse\(\s*)?"
+        )
+        for script in self.scripts:
+            for match in assignment.finditer(script.body):
+                value = _loads(script.body, match.end())
+                if match.group(1) and isinstance(value, str):
+                    value = _loads(value)
+                if value is not None:
+                    return value
+        return None
+
+
+class StructuredRule:
+    __slots__ = ("name", "kind", "path", "type", "script")
+
+    def __init__(self, name: str, rules: Dict[str, Any]):
+        """
+        jsonld:      {"jsonld": "offers.price", "type": "Product"}
+        script_json: {"script_json": "props.pageProps.product.sku", "script": "__NEXT_DATA__"}
+        Raises ValueError for a rule that can't be used.
+        """
+        self.name = name
+        self.kind = next(kind for kind in STRUCTURED_KINDS if kind in rules)
+        if not isinstance(rules[self.kind], str):
+            raise ValueError(f"{self.kind}: expected a JSON path string")
+        self.path = compile_path(rules[self.kind])
+        self.type = rules.get("type")
+        self.script = rules.get("script")
+        if self.kind == "script_json" and (not isinstance(self.script, str) or not self.script):
+            raise ValueError('script_json needs "script": a script id or a global variable name')
+
+    def value(self, data: StructuredData) -> Any:
+        """
+        The first value found, or "" like a selector that matches nothing.
+        """
+        if self.kind == "jsonld":
+            for node in data.jsonld(self.type):
+                value = resolve(node, self.path)
+                if value is not None:
+                    return value
+            return ""
+
+        payload = data.payload(self.script)
+        value = resolve(payload, self.path) if payload is not None else None
+        return "" if value is None else value
+
+
+def microdata_selector(prop: str, type_name: Optional[str] = None) -> str:
+    """
+    CSS for the elements carrying itemprop=prop, inside an itemscope of that
+    itemtype (any depth) when one is given.
+    """
+    selector = f'[itemprop~="{prop}"]'
+    if type_name is None:
+        return selector
+    if "/" in type_name:
+        return f'[itemscope][itemtype~="{type_name}"] {selector}'
+    return f'[itemscope][itemtype$="/{type_name}"] {selector}'
+
+
+def microdata_value(el: Any, base_url: str = "") -> str:
+    """
+    A property's value as microdata defines it: content / href / src / value
+    / datetime by tag, otherwise the element's text.
+    """
+    attr = MICRODATA_VALUE_ATTRS.get(el.name)
+    if attr is not None and (attr != "datetime" or el.get(attr) is not None):
+        return el.get(attr, "").strip()
+    return el.get_text(strip=True)
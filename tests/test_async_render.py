@@ -0,0 +1,131 @@
+import asyncio
+
+import async_render
+from async_render import AsyncRenderer
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        return object()
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        if not self.connected:
+            raise RuntimeError("browser has disconnected")
+        return FakeContext(self)
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    async def launch(self, headless=True):
+        self.launched.append(FakeBrowser())
+        return self.launched[-1]
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+def renderer(monkeypatch, pages=1):
+    playwright = FakePlaywright()
+    monkeypatch.setattr(async_render, "async_playwright", lambda: playwright)
+    return AsyncRenderer(pages=pages), playwright
+
+
+def test_waiter_gets_a_fresh_page_after_a_crash(monkeypatch):
+    async def scenario():
+        pool, playwright = renderer(monkeypatch)
+        held = await pool._checkout()
+        waiter = asyncio.ensure_future(pool._checkout())
+        await asyncio.sleep(0)
+
+        playwright.launched[0].connected = False
+        await pool._checkin(held, healthy=False)
+        fresh = await asyncio.wait_for(waiter, timeout=1)
+        return pool, playwright, held, fresh
+
+    pool, playwright, held, fresh = asyncio.run(scenario())
+    assert len(playwright.launched) == 2
+    assert fresh["browser"] is playwright.launched[1]
+    assert held["context"].closed
+    assert pool._created == 1
+
+
+def test_pages_of_a_dead_browser_are_not_requeued(monkeypatch):
+    async def scenario():
+        pool, playwright = renderer(monkeypatch, pages=2)
+        old = await pool._checkout()
+        playwright.launched[0].connected = False
+        new = await pool._checkout()
+        await pool._checkin(old, healthy=True)
+        return pool, playwright, old, new
+
+    pool, playwright, old, new = asyncio.run(scenario())
+    assert new["browser"] is playwright.launched[1]
+    assert old["context"].closed
+    assert all(slot is None or slot["browser"] is playwright.launched[1] for slot in pool._idle._queue)
+
+
+class BrokenPlaywright:
+    async def start(self):
+        raise RuntimeError("playwright failed to start")
+
+
+def test_render_returns_none_when_the_browser_cannot_start(monkeypatch):
+    monkeypatch.setattr(async_render, "async_playwright", lambda: BrokenPlaywright())
+    pool = AsyncRenderer(pages=1)
+    assert asyncio.run(pool.render("http://shop.example/1")) is None
+    assert pool._created == 0
+
+
+def test_parked_caller_retries_a_failed_relaunch(monkeypatch):
+    async def scenario():
+        pool, playwright = renderer(monkeypatch)
+        held = await pool._checkout()
+        first = asyncio.ensure_future(pool._checkout())
+        second = asyncio.ensure_future(pool._checkout())
+        await asyncio.sleep(0)
+
+        launch = playwright.launch
+        failures = [RuntimeError("launch failed")]
+
+        async def flaky_launch(headless=True):
+            if failures:
+                raise failures.pop()
+            return await launch(headless)
+
+        playwright.launch = flaky_launch
+        playwright.launched[0].connected = False
+        await pool._checkin(held, healthy=False)
+        done, _ = await asyncio.wait([first, second], timeout=1)
+        return playwright, first, second, done
+
+    playwright, first, second, done = asyncio.run(scenario())
+    assert done == {first, second}
+    assert isinstance(first.exception(), RuntimeError)
+    assert second.result()["browser"] is playwright.launched[1]
@@ -0,0 +1,94 @@
+import asyncio
+
+import async_engine
+import async_render
+import fetch
+from async_engine import HostScheduler
+from async_render import AsyncRenderer
+from cache import ResponseCache
+from concurrency_controller import concurrency_controller
+from rate_limiter import RateLimiter
+from render_memory import render_memory
+
+
+def test_saturated_host_does_not_hold_global_permits(monkeypatch):
+    monkeypatch.setattr(concurrency_controller, "limit", lambda url: 1)
+
+    async def scenario():
+        scheduler = HostScheduler(concurrency=2)
+        slow_release = asyncio.Event()
+        order = []
+
+        async def fetch(url, hold=None):
+            async with scheduler.slot(url):
+                order.append(url)
+                if hold is not None:
+                    await hold.wait()
+
+        # One slow request and a queue behind it on host a; host b must still get through
+        slow = asyncio.create_task(fetch("http://a/1", slow_release))
+        queued = [asyncio.create_task(fetch(f"http://a/{i}")) for i in range(2, 6)]
+        await asyncio.sleep(0)
+        other = asyncio.create_task(fetch("http://b/1"))
+        await asyncio.wait_for(other, timeout=1)
+
+        slow_release.set()
+        await asyncio.gather(slow, *queued)
+        return order
+
+    order = asyncio.run(scenario())
+    assert order.index("http://b/1") == 1
+
+
+class BrokenPlaywright:
+    async def start(self):
+        raise RuntimeError("playwright failed to start")
+
+
+def test_render_failure_is_a_failed_fetch(monkeypatch):
+    monkeypatch.setattr(async_render, "async_playwright", lambda: BrokenPlaywright())
+    monkeypatch.setattr(render_memory, "mode", "always")
+
+    async def scenario():
+        scheduler = HostScheduler(concurrency=2, renderer=AsyncRenderer(pages=1))
+        return await scheduler.fetch("http://shop.example/1", "detail")
+
+    assert asyncio.run(scenario()) is None
+
+
+
+def test_host_waiting_on_its_rate_holds_no_global_permit(monkeypatch):
+    monkeypatch.setattr(concurrency_controller, "limit", lambda url: 8)
+    monkeypatch.setattr(async_engine, "rate_limiter", RateLimiter(rate=2.0, burst=1))
+    sent = []
+
+    def fetch(url, paced):
+        sent.append((url, paced))
+        return url
+
+    async def scenario():
+        scheduler = HostScheduler(concurrency=2)
+        slow_host = [asyncio.ensure_future(scheduler.run_paced(f"http://a/{i}", fetch, f"http://a/{i}"))
+                     for i in range(4)]
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(scheduler.run_paced("http://b/1", fetch, "http://b/1"), timeout=0.3)
+        for task in slow_host:
+            task.cancel()
+        await asyncio.gather(*slow_host, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert ("http://b/1", True) in sent
+
+
+def test_cache_answers_are_not_paced(monkeypatch, tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite"), mode="read-only")
+    monkeypatch.setattr(async_engine, "response_cache", cache)
+    monkeypatch.setattr(fetch, "response_cache", cache)
+    monkeypatch.setattr(async_engine, "rate_limiter", RateLimiter(rate=0.1, burst=1))
+
+    async def scenario():
+        scheduler = HostScheduler(concurrency=2)
+        calls = [scheduler.run_paced("http://a/1", lambda url, paced: paced, "http://a/1") for _ in range(3)]
+        return await asyncio.wait_for(asyncio.gather(*calls), timeout=1)
+
+    assert asyncio.run(scenario()) == [False, False, False]
@@ -0,0 +1,165 @@
+import json
+import os
+
+import pytest
+
+from browser_extract import BrowserExtractor, PageExtract, compile_extraction, parse_list_page
+from parsing import find_next_page, parse_items
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+CONFIGS = os.path.join(os.path.dirname(__file__), os.pardir, "configs")
+BASE_URL = "http://shop.example/catalogue/"
+
+
+def load_config(name):
+    with open(os.path.join(CONFIGS, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+# Saved listing pages and configs whose rules the browser can run as-is
+BOOKS = {
+    "item_selector": "article.product_pod",
+    "fields": {
+        "title": {"selector": "h3 a", "attr": "title"},
+        "price": {"selector": ".price_color", "text": True},
+        "rating": {"selector": "p.star-rating", "class_exclude": ["star-rating"]},
+        "stock": {"selector": "p.availability"},
+        "missing": {"selector": "span.nowhere", "text": True},
+        "url": {"selector": "h3 a", "attr": "href", "absolute": True},
+    },
+    "pagination": {"selector": "li.next a", "attr": "href"},
+    "render": {"extract": "browser"},
+}
+
+CASES = [
+    ("books_listing.html", BOOKS),
+    ("quotes_listing.html", load_config("quotes_js.json")),
+]
+
+
+def configured(config):
+    extractor = BrowserExtractor()
+    extractor.configure(config, BASE_URL)
+    assert extractor.enabled
+    return extractor
+
+
+def expected(html, config):
+    return parse_items(html, config, BASE_URL), find_next_page(html, config, BASE_URL)
+
+
+# --- compile_extraction ---
+
+def test_compile_extraction_follows_parse_items_precedence():
+    spec, reason = compile_extraction(BOOKS)
+    assert reason is None
+    assert spec["item_selector"] == "article.product_pod"
+    assert spec["fields"] == [
+        ["title", "h3 a", "attr", "title"],
+        ["price", ".price_color", "text", None],
+        ["rating", "p.star-rating", "class", ["star-rating"]],
+        ["stock", "p.availability", "text", None],
+        ["missing", "span.nowhere", "text", None],
+        ["url", "h3 a", "attr", "href"],
+    ]
+    assert spec["pagination"] == {"selector": "li.next a", "attr": "href"}
+
+
+def test_compile_extraction_without_pagination():
+    config = {**BOOKS, "pagination": None}
+    spec, _ = compile_extraction(config)
+    assert spec["pagination"] is None
+
+
+@pytest.mark.parametrize("change, reason", [
+    ({"title": {"selector": "h3 a", "attr": "class"}}, "multi-valued"),
+    ({"title": {"selector": "a[rel]", "attr": "REL"}}, "multi-valued"),
+    ({"title": {"selector": "h3 a:contains('Book')", "text": True}}, "soupsieve-only"),
+    ({"title": {"selector": "h3 a:-soup-contains('Book')", "text": True}}, "soupsieve-only"),
+])
+def test_compile_extraction_falls_back_for_python_only_rules(change, reason):
+    spec, why = compile_extraction({**BOOKS, "fields": {**BOOKS["fields"], **change}})
+    assert spec is None
+    assert reason in why
+
+
+def test_soupsieve_only_item_selector_disables_extraction():
+    config = {**BOOKS, "item_selector": "article:-soup-contains('x')"}
+    extractor = BrowserExtractor()
+    extractor.configure(config, BASE_URL)
+    assert not extractor.enabled
+
+
+# --- _result / finish ---
+
+def test_result_matches_parse_items():
+    html = fixture("books_listing.html")
+    items, next_url = expected(html, BOOKS)
+    # What EXTRACT_SCRIPT returns for this page: raw hrefs, null for missing elements
+    raw = {
+        "items": [
+            {**item, "missing": None, "url": item["url"][len(BASE_URL):]}
+            for item in items
+        ],
+        "next": next_url[len(BASE_URL):],
+    }
+    result = configured(BOOKS).finish("http://shop.example/", raw)
+    assert isinstance(result, PageExtract)
+    assert result.items == items
+    assert result.next_url == next_url
+    assert all(item["missing"] == "" for item in result.items)
+
+
+def test_result_never_joins_missing_urls():
+    extractor = configured(BOOKS)
+    result = extractor.finish("http://shop.example/", {"items": [{"url": None, "title": None}], "next": None})
+    assert result.items == [{"url": "", "title": ""}]
+    assert result.next_url is None
+
+
+def test_script_error_falls_back_to_html():
+    extractor = configured(BOOKS)
+    assert extractor.finish("http://shop.example/", {"error": "SyntaxError"}) is None
+    assert extractor.finish("http://shop.example/", None) is None
+    assert extractor.stats() == {"extracted": 0, "fallbacks": 2}
+
+
+def test_parse_list_page_returns_extract_as_is():
+    page = PageExtract("http://shop.example/", [{"title": "A"}], "http://shop.example/2")
+    assert parse_list_page(page.url, page, BOOKS, BASE_URL) == ([{"title": "A"}], "http://shop.example/2")
+
+
+# --- EXTRACT_SCRIPT in a real browser, against parse_items on the same saved page ---
+
+@pytest.fixture(scope="module")
+def browser_page():
+    sync_api = pytest.importorskip("playwright.sync_api")
+    try:
+        playwright = sync_api.sync_playwright().start()
+    except Exception as e:
+        pytest.skip(f"playwright unavailable: {e}")
+    try:
+        browser = playwright.chromium.launch()
+    except Exception as e:
+        playwright.stop()
+        pytest.skip(f"chromium unavailable: {e}")
+    page = browser.new_page()
+    yield page
+    browser.close()
+    playwright.stop()
+
+
+@pytest.mark.parametrize("name, config", CASES)
+def test_in_browser_extraction_matches_parse_items(browser_page, name, config):
+    html = fixture(name)
+    browser_page.set_content(html)
+    result = configured(config).extract(browser_page, "http://shop.example/")
+    assert result is not None
+    items, next_url = expected(html, config)
+    assert result.items == items
+    assert result.next_url == next_url
@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import threading
+
+from cache import ResponseCache
+
+
+def cache_at(tmp_path, **settings):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite"), mode="read-write", **settings)
+    return cache
+
+
+def record_urls(cache):
+    return {row[0] for row in cache._connect().execute("SELECT url FROM records")}
+
+
+def test_records_are_evicted_with_their_responses(tmp_path):
+    cache = cache_at(tmp_path, max_bytes=2500)
+    for i in range(20):
+        url = f"http://shop.example/item/{i}"
+        body = os.urandom(400).hex()
+        cache.put(url, body)
+        cache.memo_parse(url, body, "detail", lambda: {"n": i})
+
+    stored = {row[0] for row in cache._connect().execute("SELECT url FROM responses")}
+    assert len(stored) < 20
+    assert record_urls(cache) == stored
+
+
+def test_url_less_records_of_older_files_are_dropped(tmp_path):
+    path = tmp_path / "responses.sqlite"
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE records (key TEXT PRIMARY KEY, digest TEXT, record TEXT)")
+    db.execute("INSERT INTO records VALUES ('k', 'd', '{}')")
+    db.commit()
+    db.close()
+
+    cache = cache_at(tmp_path)
+    assert record_urls(cache) == set()
+    cache.memo_parse("http://shop.example/", "<html></html>", "list", lambda: [])
+    assert record_urls(cache) == {"http://shop.example/"}
+
+
+def test_counters_are_exact_across_threads(tmp_path):
+    cache = cache_at(tmp_path)
+    cache.put("http://shop.example/", "<html></html>")
+
+    def read():
+        for _ in range(200):
+            cache.lookup("http://shop.example/")
+            cache.lookup("http://shop.example/missing")
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1600, 1600)
@@ -0,0 +1,46 @@
+import pytest
+
+import concurrency_controller
+from concurrency_controller import AIMDController
+
+URL = "http://shop.example/item"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(concurrency_controller.time, "monotonic", lambda: now[0])
+    return now
+
+
+def feed(controller, clock, count, latency, kind=None):
+    for _ in range(count):
+        clock[0] += latency
+        controller.record(URL, 200, latency, kind)
+
+
+def test_baseline_follows_a_lasting_latency_shift(clock):
+    controller = AIMDController(initial=4, min_limit=1, max_limit=16)
+    feed(controller, clock, 40, 0.10)
+    feed(controller, clock, 400, 0.25)
+    assert controller.stats()["shop.example"]["limit"] > 1
+    assert controller._hosts["shop.example"].baselines["page"] == pytest.approx(0.25, abs=0.01)
+
+
+def test_cut_clears_the_latency_window(clock):
+    controller = AIMDController(initial=8, min_limit=1)
+    feed(controller, clock, 10, 0.1)
+    state = controller._hosts["shop.example"]
+    before = state.limit
+    controller.record(URL, 429, 0.1)
+    assert state.limit == before / 2
+    assert not state.all_latencies()
+
+
+def test_slower_page_kind_is_not_congestion(clock):
+    controller = AIMDController(initial=4, max_limit=16)
+    for _ in range(300):
+        clock[0] += 0.1
+        controller.record(URL, 200, 0.05, "list")
+        controller.record(URL, 200, 0.6, "detail")
+    assert controller.stats()["shop.example"]["limit"] == 16
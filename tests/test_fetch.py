@@ -0,0 +1,57 @@
+import threading
+import time
+
+import fetch
+from concurrency_controller import AIMDController
+from rate_limiter import RateLimiter
+
+
+class FakeResponse:
+    status_code = 200
+    text = "<html></html>"
+    headers = {}
+
+
+class FakeSession:
+    def __init__(self, first_latency):
+        self.first_latency = first_latency
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        with self._lock:
+            self.sent.append(time.monotonic())
+            first = len(self.sent) == 1
+        if first:
+            time.sleep(self.first_latency)
+        return FakeResponse()
+
+
+class FakePool:
+    def __init__(self, session):
+        self.session = session
+
+    def get_session(self, url, proxy=None):
+        return self.session
+
+
+def test_queued_requests_do_not_bank_tokens(monkeypatch):
+    session = FakeSession(first_latency=0.4)
+    monkeypatch.setattr(fetch, "session_pool", FakePool(session))
+    monkeypatch.setattr(fetch, "rate_limiter", RateLimiter(rate=10.0, burst=1))
+    monkeypatch.setattr(fetch, "concurrency_controller", AIMDController(initial=1, max_limit=1))
+
+    threads = [
+        threading.Thread(target=fetch.fetch_url, args=(f"http://shop.example/{i}",))
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    gaps = [later - earlier for earlier, later in zip(session.sent, session.sent[1:])]
+    assert len(gaps) == 3
+    # One slot: the first send holds it 0.4s; the rest still go out 0.1s apart
+    assert all(gap >= 0.08 for gap in gaps)
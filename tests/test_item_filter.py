@@ -0,0 +1,41 @@
+import json
+
+from item_filter import ItemFilter, ListingFilters
+
+FIELDS = {"title": {}, "price": {}, "url": {}}
+
+
+def items(*urls):
+    return [{"title": f"Book {url}", "price": "£20.00", "url": url} for url in urls]
+
+
+def configured(path, **filters):
+    item_filter = ItemFilter()
+    item_filter.configure(ListingFilters({"unseen": True, **filters}, FIELDS), path=str(path))
+    return item_filter
+
+
+def test_items_are_seen_only_once_their_record_is_merged(tmp_path):
+    path = tmp_path / "seen_items.json"
+    first = configured(path)
+    passed = first.apply(items("a", "b", "a"))
+    assert [item["url"] for item in passed] == ["a", "b"]
+
+    # Only "a" got its detail page merged; "b" was dead-lettered
+    first.remember(passed[:1])
+    first.save()
+    assert json.loads(path.read_text()) == ["a"]
+
+    second = configured(path)
+    assert [item["url"] for item in second.apply(items("a", "b"))] == ["b"]
+    assert second.stats()["by_filter"] == {"unseen": 1}
+
+
+def test_filtered_out_items_are_not_remembered(tmp_path):
+    path = tmp_path / "seen_items.json"
+    first = configured(path, price={"max": 10})
+    assert first.apply(items("a")) == []
+    first.save()
+
+    second = configured(path)
+    assert len(second.apply(items("a"))) == 1
@@ -0,0 +1,47 @@
+import pytest
+
+from parsing import parse_items
+from site_config import ConfigError, SiteConfig
+
+LISTING = """
+<html><body>
+<nav><ul><li><a href="/">Home</a></li></ul></nav>
+<ol class="row">
+  <li><article class="product_pod"><h3><a href="a.html" title="Alpha">Alpha</a></h3>
+      <p class="price_color">£10.00</p></article></li>
+  <li><article class="product_pod"><h3><a href="b.html" title="Beta">Beta</a></h3>
+      <p class="price_color">£20.00</p></article></li>
+</ol>
+<ul class="pager"><li class="next"><a href="page-2.html">next</a></li></ul>
+</body></html>
+"""
+
+
+def config(fields, parse_only="auto", item_selector="article.product_pod"):
+    return SiteConfig({
+        "item_selector": item_selector,
+        "fields": fields,
+        "pagination": {"selector": "li.next a"},
+        "parse_only": parse_only,
+        "parse_engine": "tree",
+    })
+
+
+def test_ancestor_dependent_field_matches_full_tree():
+    fields = {
+        "title": {"selector": "li h3 a", "attr": "title"},
+        "price": {"selector": "ol.row > li .price_color", "text": True},
+    }
+    scoped = parse_items(LISTING, config(fields), "http://shop/")
+    full = parse_items(LISTING, config(fields, parse_only=None), "http://shop/")
+    assert scoped == full == [
+        {"title": "Alpha", "price": "£10.00"},
+        {"title": "Beta", "price": "£20.00"},
+    ]
+
+
+def test_sibling_dependent_containers_are_rejected():
+    with pytest.raises(ConfigError, match="fields.title"):
+        config({"title": {"selector": "li:nth-child(2) h3 a", "attr": "title"}})
+    with pytest.raises(ConfigError, match="item_selector"):
+        config({"title": {"selector": "h3 a"}}, item_selector="article:first-child h3")
@@ -0,0 +1,47 @@
+from response_capture import Recorder, ResponseCapture
+
+CONFIG = {
+    "item_selector": "div.quote",
+    "fields": {"quote": {"selector": "span.text", "text": True}},
+    "pagination": {"selector": "li.next a", "attr": "href"},
+    "render": {"capture": {"url_pattern": "/api/quotes", "items": "quotes", "fields": {"quote": "text"}}},
+}
+
+
+class FakeResponse:
+    url = "http://quotes.example/api/quotes?page=1"
+
+    def json(self):
+        return {"quotes": [{"text": "A"}, {"text": "B"}]}
+
+
+class FakePage:
+    """
+    A page whose pager only exists once the listing wait has run.
+    """
+
+    def __init__(self):
+        self.waited = False
+
+    def on(self, event, handler):
+        handler(FakeResponse())
+
+    def remove_listener(self, event, handler):
+        pass
+
+    def evaluate(self, script, arg):
+        return "/page/2/" if self.waited else None
+
+
+class FakeWait:
+    def wait(self, page):
+        page.waited = True
+
+
+def test_next_link_is_read_after_the_listing_wait():
+    capture = ResponseCapture()
+    capture.configure(CONFIG, "http://quotes.example/")
+    page = FakePage()
+    result = capture.stop(page, Recorder(capture, page), "http://quotes.example/js/", FakeWait())
+    assert [item["quote"] for item in result.items] == ["A", "B"]
+    assert result.next_url == "http://quotes.example/page/2/"
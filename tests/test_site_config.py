@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from site_config import ConfigError, SiteConfig, load_config
+
+CONFIGS = os.path.join(os.path.dirname(__file__), os.pardir, "configs")
+
+
+@pytest.fixture
+def base():
+    with open(os.path.join(CONFIGS, "books_toscrape.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_shipped_configs_load():
+    for name in os.listdir(CONFIGS):
+        load_config(os.path.join(CONFIGS, name))
+
+
+@pytest.mark.parametrize("section, message", [
+    ({"render": {"wait": {"strategy": "idle"}}}, "render.wait.strategy"),
+    ({"render": {"wait": "selectr"}}, "render.wait.strategy"),
+    ({"render": {"detail_wait": {"strategy": "selector"}}}, "render.detail_wait"),
+    ({"render": {"detail_wait": {"min_count": "ten"}}}, "render.detail_wait.min_count"),
+    ({"render": {"mode": "sometimes"}}, "render.mode"),
+    ({"render": {"waitt": {}}}, "unknown keys"),
+    ({"render": {"extract": "Browser"}}, "render.extract"),
+    ({"render": {"block": {"domains": "tracker.example"}}}, "render.block.domains"),
+    ({"render": {"capture": {"fields": {"quote": "text"}}}}, "render.capture.url_pattern"),
+    ({"render": {"capture": {"url_pattern": "(", "fields": {"quote": "text"}}}}, "render.capture.url_pattern"),
+    ({"render": {"capture": {"url_pattern": "/api"}}}, "render.capture.fields"),
+    ({"api": {"fields": {"quote": "text"}}}, "api.url"),
+    ({"api": {"url": "http://x/api?c={cursor}", "fields": {"quote": "text"}}}, "api.url"),
+    ({"api": {"url": "http://x/api", "fields": {"quote": "text["}}}, "api.fields.quote"),
+    ({"api": {"url": "http://x/api/{page}", "start_page": "1", "fields": {"quote": "text"}}}, "api.start_page"),
+])
+def test_bad_render_and_api_sections_name_the_key(base, section, message):
+    with pytest.raises(ConfigError, match=message.replace(".", r"\.")):
+        SiteConfig({**base, **section})
+
+
+def test_valid_render_and_api_sections(base):
+    SiteConfig({
+        **base,
+        "render": {
+            "mode": "auto", "learn_after": 3, "wait": "networkidle", "block": False,
+            "detail_wait": {"strategy": "dom_stable", "quiet_ms": 300},
+            "capture": {"url_pattern": "/api/quotes", "items": "quotes", "fields": {"quote": "text"}, "next": "next"},
+        },
+        "api": {"url": "http://x/api/{page}", "start_page": 1, "items": "quotes",
+                "fields": {"quote": "text"}, "has_next": "has_next"},
+    })
@@ -0,0 +1,49 @@
+import pytest
+
+import smart_fetch
+from cache import ResponseCache
+from render_memory import RenderMemory
+from smart_fetch import needs_render, render_reason
+
+STATIC_PAGE = "<html><head><title>Shop</title></head><body>" + "<p>item</p>" * 40 + "</body></html>"
+
+
+@pytest.mark.parametrize("markup", [
+    '<div class="g-recaptcha" data-sitekey="x"></div>',
+    '<div class="h-captcha"></div>',
+    "<div class='cf-challenge'></div><p>cloudflare</p>",
+    '<div class=cf-captcha-container></div>',
+    '<div id="challenge" class="main cf-challenge-running captcha-box"></div>',
+    "<recaptcha-widget></recaptcha-widget>",
+    '<div class="verify">verify you are human</div>',
+])
+def test_signals_inside_tag_names_and_class_values(markup):
+    html = STATIC_PAGE.replace("<body>", "<body>" + markup)
+    assert render_reason(html) == "Anti-bot page detected"
+
+
+def test_signal_in_text_and_comments():
+    assert render_reason(STATIC_PAGE.replace("item", "Access denied", 1)) == "Anti-bot page detected"
+    assert render_reason(STATIC_PAGE + "<!-- cloudflare -->") == "Anti-bot page detected"
+
+
+def test_static_page_is_usable():
+    assert render_reason(STATIC_PAGE) is None
+    assert render_reason(STATIC_PAGE.replace("<p>", '<p class="price quote-box">')) is None
+
+
+def test_quotes_page_without_quote_blocks():
+    html = "<html><head><title>Quotes to Scrape</title></head><body>" + "<p>x</p>" * 40 + "</body></html>"
+    assert render_reason(html) == "JS-only quotes page detected"
+    assert render_reason(html.replace("<p>", '<p class="quote">')) is None
+
+
+@pytest.mark.parametrize("mode, learned", [("off", ["shop.example list"]), ("read-only", [])])
+def test_replay_misses_are_not_learned(monkeypatch, tmp_path, mode, learned):
+    memory = RenderMemory(threshold=2)
+    monkeypatch.setattr(smart_fetch, "render_memory", memory)
+    monkeypatch.setattr(smart_fetch, "response_cache", ResponseCache(str(tmp_path / "r.sqlite"), mode=mode))
+
+    for i in range(3):
+        assert needs_render(f"http://shop.example/{i}", "list", None) == "Static fetch failed"
+    assert memory.stats()["render_first"] == learned
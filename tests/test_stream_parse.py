@@ -0,0 +1,159 @@
+import os
+
+import pytest
+
+from parsing import parse_detail_page, parse_listing
+from site_config import CompiledFields, SiteConfig
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+BASE_URL = "http://shop.example/catalogue/"
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def engines(config):
+    stream = SiteConfig({**config, "parse_engine": "stream"})
+    tree = SiteConfig({**config, "parse_engine": "tree"})
+    assert stream.stream is not None
+    return stream, tree
+
+
+BOOKS = {
+    "item_selector": "article.product_pod",
+    "fields": {
+        "title": {"selector": "h3 a", "attr": "title"},
+        "price": {"selector": ".price_color", "text": True},
+        "rating": {"selector": "p.star-rating", "class_exclude": ["star-rating"]},
+        "stock": {"selector": "p.availability"},
+        "image": {"selector": "div.image_container > a > img", "attr": "src", "absolute": True},
+        "missing": {"selector": "span.nowhere", "text": True},
+        "url": {"selector": "h3 a", "attr": "href", "absolute": True},
+    },
+    "pagination": {"selector": "li.next a", "attr": "href", "absolute": True},
+}
+
+QUOTES = {
+    "item_selector": "div.quote",
+    "fields": {
+        "quote": {"selector": "span.text", "text": True},
+        "author": {"selector": "small.author", "text": True},
+        "author_url": {"selector": "span > a", "attr": "href", "absolute": True},
+        "tags": {"selector": "div.tags a.tag", "text": True},
+        "keywords": {"selector": "meta[itemprop=keywords]", "attr": "content"},
+    },
+    "pagination": {"selector": "li.next a", "attr": "href", "absolute": True},
+}
+
+# One item per .item; fields read .t (text), a (href / title), .c (first class left
+# after exclusion) and a word of a multi-valued rel
+ITEMS = {
+    "item_selector": "div.item",
+    "fields": {
+        "text": {"selector": ".t", "text": True},
+        "link": {"selector": "a", "attr": "href", "absolute": True},
+        "title": {"selector": "a", "attr": "title"},
+        "kind": {"selector": ".c", "class_exclude": ["c"]},
+        "noopener": {"selector": "a[rel~=noopener]", "attr": "href"},
+    },
+    "pagination": {"selector": "a.next", "attr": "href", "absolute": True},
+}
+
+
+def page(*items, tail=""):
+    return "<html><body><main>" + "".join(items) + "</main>" + tail + "</body></html>"
+
+
+EDGE_CASES = {
+    "entities": page(
+        '<div class="item"><p class="t">Caf&eacute; &amp; cr&egrave;me &copy;&nbsp;2024 &lt;b&gt;</p>'
+        '<a href="/x?a=1&amp;b=2&copy=3" title="A &quot;B&quot; &amp C">x</a></div>',
+        '<div class="item"><p class="t">&notanentity; &amp &AMP; &ampx &eacutex &;</p></div>',
+    ),
+    "charrefs": page(
+        '<div class="item"><p class="t">&#169; &#xA9; &#X263a; &#128512; &#65 &#x41z</p></div>',
+        '<div class="item"><p class="t">&#0; &#x110000; &#150; &#xD800; &#;</p>'
+        '<a href="p&#46;html" title="&#34;q&#x22;">x</a></div>',
+    ),
+    "void and stray end tags": page(
+        '<div class="item"><p class="t">a<br>b</br>c<img src="i.png"></img>d<hr/>e</p></div>',
+        '<div class="item"></span><p class="t">one</b>two</p></p><a href="n.html">x</a></div>',
+        '<div class="item"><p class="t">unclosed <b>bold <i>both</b> italic</i></div>',
+    ),
+    "script, style and template strings": page(
+        '<div class="item"><p class="t">x<script>var s = "</p>";</script>y'
+        '<style>.t { color: red }</style>z<template>tpl</template>w</p></div>',
+        '<div class="item"><script>document.write("<a href=no.html>")</script>'
+        '<p class="t">after</p><a href="yes.html">y</a></div>',
+    ),
+    "nested item matches": page(
+        '<div class="item"><p class="t">outer</p>'
+        '<div class="item"><p class="t">inner</p><a href="inner.html">i</a></div>'
+        '<a href="outer.html">o</a></div>',
+        '<div class="item"><div class="item"><div class="item"><p class="t">deep</p></div></div></div>',
+    ),
+    "cdata, comments and declarations": page(
+        '<div class="item"><p class="t">a<![CDATA[b <c>]]>d<!-- e -->f<?pi g?>h</p></div>',
+        '<!DOCTYPE html><div class="item"><p class="t"><!-- only a comment --></p></div>',
+        '<div class="item"><svg><p class="t"><![CDATA[in svg]]></p></svg></div>',
+    ),
+    "classes and multi-valued attributes": page(
+        '<div class="item"><span class="  c   sale\tnew ">s</span>'
+        '<a rel="nofollow  noopener" href=" spaced.html ">x</a></div>',
+        '<div class="item"><span class="c">only excluded</span><a rel="" href="">x</a></div>',
+        '<DIV CLASS="item"><P CLASS="t">Upper</P><A HREF="UP.html" TITLE="T">x</A></DIV>',
+    ),
+    "duplicate attributes and whitespace text": page(
+        '<div class="item"><a href="first.html" href="second.html" title=x title=y>x</a>'
+        '<p class="t">\n   spaced\n\t out   </p></div>',
+        '<div class="item"><p class="t">   </p></div>',
+        tail='<a class="next" href="  page-2.html  ">next</a>',
+    ),
+    "no items": page("<p class=\"t\">not in an item</p>", tail='<a class="next">no href</a>'),
+}
+
+
+@pytest.mark.parametrize("name, config", [
+    ("books_listing.html", BOOKS),
+    ("quotes_listing.html", QUOTES),
+])
+def test_stream_matches_tree_on_saved_listings(name, config):
+    html = fixture(name)
+    stream, tree = engines(config)
+    items, next_url = parse_listing(html, stream, BASE_URL)
+    assert items
+    assert (items, next_url) == parse_listing(html, tree, BASE_URL)
+
+
+@pytest.mark.parametrize("html", EDGE_CASES.values(), ids=EDGE_CASES.keys())
+def test_stream_matches_tree_on_edge_markup(html):
+    stream, tree = engines(ITEMS)
+    assert parse_listing(html, stream, BASE_URL) == parse_listing(html, tree, BASE_URL)
+
+
+DETAIL_FIELDS = {
+    "name": {"selector": "h1"},
+    "price": {"selector": "p.price", "text": True},
+    "image": {"selector": "#main img", "attr": "src"},
+    "crumb": {"selector": "ul.breadcrumb > li > a", "attr": "href"},
+    "description": {"selector": "#description p", "text": True},
+    "missing": {"selector": "span.nowhere"},
+}
+
+
+@pytest.mark.parametrize("html", [
+    '<html><body><ul class="breadcrumb"><li><a href="/">Home</a></li></ul>'
+    '<div id="main"><h1>Caf&eacute; &amp; Co</h1><p class="price">&pound;9.99</p>'
+    '<img src="a.jpg"><img src="b.jpg"></div>'
+    '<div id="description"><p>First<br>line</p><p>second</p></div></body></html>',
+    '<html><body><h1>Title<script>var h = "<h1>";</script></h1>'
+    '<p class="price"><![CDATA[12]]><!-- c -->.50</p><h1>second h1</h1></body></html>',
+    "<html><body><p>no fields here</p></body></html>",
+], ids=["page", "script and cdata", "empty"])
+def test_streamed_detail_fields_match_tree(html):
+    stream = CompiledFields("detail_fields", DETAIL_FIELDS, detail=True, stream=True)
+    tree = CompiledFields("detail_fields", DETAIL_FIELDS, detail=True, stream=False)
+    assert stream.stream is not None
+    assert parse_detail_page(html, stream) == parse_detail_page(html, tree)